@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+        # last_login est mis à jour par signals.update_last_login, avec une limite de fréquence.
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+        from . import signals  # noqa: F401
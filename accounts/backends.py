@@ -0,0 +1,93 @@
+import copy
+import threading
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+# Comptes authentifiés mis en cache : une copie par processus, une dans le cache partagé, toutes deux
+# rattachées à un jeton de version du compte. Enregistrer ou supprimer le compte change le jeton
+# (voir signals.py) : chaque processus s'en aperçoit à la requête suivante, sans lire la base.
+UserModel = get_user_model()
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _version_key(user_id):
+    return f"account-version:{user_id}"
+
+
+def _account_key(user_id, version):
+    return f"account:{user_id}:{version}"
+
+
+def bump_account_version(user_id):
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+    with _local_lock:
+        _local.pop(str(user_id), None)
+
+
+def _version_or_new(user_id, version):
+    # Jeton absent (jamais créé ou évincé) : on en pose un, en gardant celui d'un processus plus rapide.
+    if version is None:
+        cache.add(_version_key(user_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def _local_get(user_id, version):
+    with _local_lock:
+        entry = _local.get(str(user_id))
+        if entry is None or entry[0] != version:
+            return None
+        _local.move_to_end(str(user_id))
+        return entry[1]
+
+
+def _local_set(user_id, version, user):
+    with _local_lock:
+        _local[str(user_id)] = (version, user)
+        _local.move_to_end(str(user_id))
+        while len(_local) > getattr(settings, 'ACCOUNT_LOCAL_CACHE_SIZE', 1000):
+            _local.popitem(last=False)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose per-request user lookup is served from cache (one cache read in steady state)."""
+
+    def get_user(self, user_id):
+        version = _version_or_new(user_id, cache.get(_version_key(user_id)))
+        user = _local_get(user_id, version)
+        if user is None:
+            user = cache.get(_account_key(user_id, version))
+            if user is None:
+                try:
+                    user = UserModel._default_manager.get(pk=user_id)
+                except UserModel.DoesNotExist:
+                    return None
+                cache.set(_account_key(user_id, version), user)
+            _local_set(user_id, version, user)
+        # Chaque requête reçoit sa propre copie : l'instance en cache n'est jamais modifiée.
+        user = copy.copy(user)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        version = await cache.aget(_version_key(user_id))
+        if version is None:
+            await cache.aadd(_version_key(user_id), uuid.uuid4().hex, None)
+            version = await cache.aget(_version_key(user_id))
+        user = _local_get(user_id, version)
+        if user is None:
+            user = await cache.aget(_account_key(user_id, version))
+            if user is None:
+                try:
+                    user = await UserModel._default_manager.aget(pk=user_id)
+                except UserModel.DoesNotExist:
+                    return None
+                await cache.aset(_account_key(user_id, version), user)
+            _local_set(user_id, version, user)
+        user = copy.copy(user)
+        return user if self.user_can_authenticate(user) else None
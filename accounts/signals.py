@@ -0,0 +1,29 @@
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .backends import bump_account_version
+from .models import Account
+
+# Le compte en cache (backends.CachedModelBackend) est invalidé une fois la transaction validée.
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidate_cached_account(sender, instance, **kwargs):
+    # pk lu tout de suite : après une suppression, instance.pk vaut None au moment du commit.
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_account_version(user_id))
+
+# Remplace update_last_login de django.contrib.auth (déconnecté dans apps.py) :
+# last_login n'est réécrit qu'une fois par LAST_LOGIN_UPDATE_INTERVAL secondes au plus.
+@receiver(user_logged_in)
+def update_last_login(sender, request, user, **kwargs):
+    now = timezone.now()
+    interval = timedelta(seconds=getattr(settings, 'LAST_LOGIN_UPDATE_INTERVAL', 3600))
+    if user.last_login and now - user.last_login < interval:
+        return
+    user.last_login = now
+    Account.objects.filter(pk=user.pk).update(last_login=now)
+    transaction.on_commit(lambda: bump_account_version(user.pk))
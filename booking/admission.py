@@ -0,0 +1,328 @@
+import math
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import render
+
+# Contrôle d'admission pendant les ouvertures de ventes : limiteur de débit par client et salle
+# d'attente FIFO par séance. Tout l'état est dans le cache (incr et add y sont atomiques), donc
+# partagé entre les processus du serveur.
+
+
+# --- Limiteur de débit -------------------------------------------------------------------------
+# Fenêtre glissante : compteur de la fenêtre courante + part restante de la précédente. Équivaut
+# à un seau de `limit` jetons rechargé en `period` secondes. Le compteur est incrémenté (incr,
+# atomique) avant d'être comparé à la limite : deux processus ne peuvent pas dépenser le même jeton.
+# Les requêtes refusées comptent aussi, un client qui insiste reste bloqué.
+
+def rate_limit_for(scope):
+    """(limit, period) for a scope from RATE_LIMITS, or None when it is not limited."""
+    return getattr(settings, 'RATE_LIMITS', {}).get(scope)
+
+
+def _client_id(request, user):
+    if user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _window_keys(scope, client, period, now):
+    window = int(now // period)
+    return f"ratelimit:{scope}:{client}:{window}", f"ratelimit:{scope}:{client}:{window - 1}"
+
+
+def _retry_after(current, previous, limit, period, now):
+    # Secondes avant que la part de la fenêtre précédente ait assez décru pour libérer un jeton.
+    elapsed = (now % period) / period
+    if previous and current <= limit:
+        wait = (1 - (limit - current) / previous - elapsed) * period
+    else:
+        wait = period - now % period
+    return max(1, math.ceil(wait))
+
+
+def _over_limit(current, previous, limit, period, now):
+    # `current` compte déjà la requête en cours : le compteur est incrémenté avant la comparaison,
+    # donc deux requêtes simultanées ne peuvent pas obtenir la même valeur ni passer ensemble.
+    return previous * (1 - (now % period) / period) + current > limit
+
+
+def consume(scope, client):
+    """Spend one request of `client` in `scope`. Returns None when allowed, else seconds to wait."""
+    rule = rate_limit_for(scope)
+    if rule is None:
+        return None
+    limit, period = rule
+    now = time.time()
+    current_key, previous_key = _window_keys(scope, client, period, now)
+    cache.add(current_key, 0, period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Clé évincée entre add et incr : on la repose.
+        cache.add(current_key, 0, period * 2)
+        current = cache.incr(current_key)
+    previous = cache.get(previous_key, 0)
+    if _over_limit(current, previous, limit, period, now):
+        return _retry_after(current, previous, limit, period, now)
+    return None
+
+
+async def aconsume(scope, client):
+    rule = rate_limit_for(scope)
+    if rule is None:
+        return None
+    limit, period = rule
+    now = time.time()
+    current_key, previous_key = _window_keys(scope, client, period, now)
+    await cache.aadd(current_key, 0, period * 2)
+    try:
+        current = await cache.aincr(current_key)
+    except ValueError:
+        await cache.aadd(current_key, 0, period * 2)
+        current = await cache.aincr(current_key)
+    previous = await cache.aget(previous_key, 0)
+    if _over_limit(current, previous, limit, period, now):
+        return _retry_after(current, previous, limit, period, now)
+    return None
+
+
+def _too_many_requests(request, retry_after, template):
+    if template:
+        response = render(request, template, {
+            'error': f"Too many requests, please try again in {retry_after} seconds.",
+            'tomorrow': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+        }, status=429)
+    else:
+        response = HttpResponse('Too many requests', status=429, content_type='text/plain')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, template=None):
+    """
+    Limit a view (sync or async) to RATE_LIMITS[scope] = (requests, seconds) per user, or per IP
+    for anonymous visitors. Refused requests get a 429 with Retry-After, rendered with `template` if given.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                retry_after = await aconsume(scope, _client_id(request, await request.auser()))
+                if retry_after is not None:
+                    return _too_many_requests(request, retry_after, template)
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                retry_after = consume(scope, _client_id(request, request.user))
+                if retry_after is not None:
+                    return _too_many_requests(request, retry_after, template)
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Salle d'attente ---------------------------------------------------------------------------
+# Ouverte par séance (page staff « Waiting rooms » ou commande waiting_room) avec un nombre d'acheteurs simultanés. Chaque arrivant
+# tire un numéro (incr) ; un numéro reste « vivant » tant que son navigateur interroge le statut.
+# À chaque interrogation, les numéros en tête sont admis dans l'ordre tant qu'une place est libre
+# (cache.add sur la place) ; les numéros abandonnés sont sautés. Une place expire seule après
+# WAITING_ROOM_SESSION_TTL, même si l'acheteur disparaît sans payer.
+# L'état doit être partagé par tous les processus du serveur : avec LocMemCache (un cache par
+# processus), seule la page staff, exécutée dans le serveur, agit — et sur ce seul processus.
+TOKEN_SALT = 'booking.waiting-room'
+OPEN_ROOMS_KEY = 'waitroom:open'
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """False when the default cache lives in each process (LocMemCache) or stores nothing (DummyCache)."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def _room_key(show_id):
+    return f"waitroom:{show_id}:capacity"
+
+
+def _tail_key(show_id):
+    return f"waitroom:{show_id}:tail"
+
+
+def _head_key(show_id):
+    return f"waitroom:{show_id}:head"
+
+
+def _alive_key(show_id, ticket):
+    return f"waitroom:{show_id}:alive:{ticket}"
+
+
+def _admitted_key(show_id, ticket):
+    return f"waitroom:{show_id}:admitted:{ticket}"
+
+
+def _slot_key(show_id, slot):
+    return f"waitroom:{show_id}:slot:{slot}"
+
+
+def _advance_key(show_id, ticket):
+    return f"waitroom:{show_id}:advance:{ticket}"
+
+
+def alive_ttl():
+    return getattr(settings, 'WAITING_ROOM_ALIVE_TTL', 30)
+
+
+def session_ttl():
+    return getattr(settings, 'WAITING_ROOM_SESSION_TTL', 600)
+
+
+def poll_interval():
+    return getattr(settings, 'WAITING_ROOM_POLL_INTERVAL', 5)
+
+
+def room_capacity(show_id):
+    """Concurrent buyers admitted for the show, or None when it has no waiting room."""
+    return cache.get(_room_key(show_id))
+
+
+def open_room(show_id, capacity):
+    cache.set(_room_key(show_id), capacity, None)
+    cache.add(_tail_key(show_id), 0, None)
+    cache.add(_head_key(show_id), 1, None)
+    cache.set(OPEN_ROOMS_KEY, sorted(set(cache.get(OPEN_ROOMS_KEY, [])) | {int(show_id)}), None)
+
+
+def close_room(show_id):
+    # Les compteurs sont gardés : une réouverture ne redonne jamais un numéro déjà distribué.
+    # Numéros et places restants expirent seuls.
+    cache.delete(_room_key(show_id))
+    cache.set(OPEN_ROOMS_KEY, sorted(set(cache.get(OPEN_ROOMS_KEY, [])) - {int(show_id)}), None)
+
+
+def open_rooms():
+    """Ids of the shows whose waiting room is open."""
+    return [show_id for show_id in cache.get(OPEN_ROOMS_KEY, []) if room_capacity(show_id) is not None]
+
+
+def room_status(show_id):
+    """(capacity, buyers admitted, tickets issued, next ticket to admit), for the staff page and command."""
+    capacity = room_capacity(show_id)
+    if capacity is None:
+        return None
+    slots = cache.get_many([_slot_key(show_id, slot) for slot in range(capacity)])
+    return capacity, len(slots), cache.get(_tail_key(show_id), 0), cache.get(_head_key(show_id), 1)
+
+
+def join(show_id):
+    """Take the next ticket in the show's queue."""
+    try:
+        ticket = cache.incr(_tail_key(show_id))
+    except ValueError:
+        cache.add(_tail_key(show_id), 0, None)
+        ticket = cache.incr(_tail_key(show_id))
+    cache.set(_alive_key(show_id, ticket), True, alive_ttl())
+    return ticket
+
+
+def _advance(show_id, capacity):
+    # Admet les numéros dans l'ordre. cache.add sur (file, numéro) garantit qu'un seul processus
+    # traite un numéro donné, donc la tête n'avance qu'une fois par numéro.
+    while True:
+        head = cache.get(_head_key(show_id))
+        if head is None:
+            cache.add(_head_key(show_id), 1, None)
+            continue
+        if head > cache.get(_tail_key(show_id), 0):
+            return
+        if not cache.add(_advance_key(show_id, head), True, 5):
+            return
+        if cache.get(_admitted_key(show_id, head)) is not None:
+            pass  # déjà admis par un processus interrompu avant d'avancer la tête
+        elif cache.get(_alive_key(show_id, head)) is not None:
+            keys = [_slot_key(show_id, slot) for slot in range(capacity)]
+            taken = cache.get_many(keys)
+            slot = next(
+                (slot for slot, key in enumerate(keys) if key not in taken and cache.add(key, head, session_ttl())),
+                None,
+            )
+            if slot is None:
+                # Salle pleine : le numéro reste en tête jusqu'à la prochaine place libérée.
+                cache.delete(_advance_key(show_id, head))
+                return
+            cache.set(_admitted_key(show_id, head), slot, session_ttl())
+        cache.incr(_head_key(show_id))
+
+
+def poll(show_id, ticket):
+    """
+    Keep the ticket alive and admit whoever is due. Returns (admitted, position), position being
+    the number of tickets ahead plus one (abandoned ones included) while waiting, or None when the
+    ticket has lapsed (skipped while its owner stopped polling, or its place expired).
+    """
+    capacity = room_capacity(show_id)
+    if capacity is None:
+        return True, 0
+    if is_admitted(show_id, ticket):
+        return True, 0
+    cache.set(_alive_key(show_id, ticket), True, alive_ttl())
+    _advance(show_id, capacity)
+    if is_admitted(show_id, ticket):
+        return True, 0
+    head = cache.get(_head_key(show_id), 1)
+    if ticket < head:
+        return False, None
+    return False, ticket - head + 1
+
+
+def is_admitted(show_id, ticket):
+    if ticket is None:
+        return False
+    slot = cache.get(_admitted_key(show_id, ticket))
+    return slot is not None and cache.get(_slot_key(show_id, slot)) == ticket
+
+
+def leave(show_id, ticket):
+    """Free the buyer's place (after their checkout) for the next ticket in the queue."""
+    slot = cache.get(_admitted_key(show_id, ticket))
+    if slot is not None and cache.get(_slot_key(show_id, slot)) == ticket:
+        cache.delete(_slot_key(show_id, slot))
+    cache.delete_many([_admitted_key(show_id, ticket), _alive_key(show_id, ticket)])
+
+
+def make_token(show_id, ticket):
+    return signing.dumps({'show': int(show_id), 'ticket': ticket}, salt=TOKEN_SALT)
+
+
+def read_token(token, show_id):
+    """The ticket of a polling token issued for this show, or None if it is invalid."""
+    try:
+        data = signing.loads(token or '', salt=TOKEN_SALT)
+        show_id = int(show_id)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    return data['ticket'] if data.get('show') == show_id else None
+
+
+def cookie_name(show_id):
+    return f"waitroom_{show_id}"
+
+
+def request_ticket(request, show_id):
+    """The ticket carried by the request's waiting-room cookie for this show, or None."""
+    return read_token(request.COOKIES.get(cookie_name(show_id)), show_id)
+
+
+def admitted(request, show_id):
+    """True when the show has no waiting room or the request holds an admitted ticket."""
+    if room_capacity(show_id) is None:
+        return True
+    return is_admitted(show_id, request_ticket(request, show_id))
@@ -0,0 +1,105 @@
+from functools import lru_cache
+from .seatmap import SEATS_PER_ROW, ROW_LABELS, MAX_SEATS, seat_label
+
+# Attribution automatique de sièges pour les groupes : le meilleur bloc contigu d'une rangée,
+# sinon le moins de blocs possible. Tout se fait par tables précalculées sur le masque 8 bits
+# de chaque rangée (bit c = colonne c occupée), sans parcourir les sièges un à un.
+ROW_CENTRE = (SEATS_PER_ROW - 1) / 2
+
+
+def _free_runs(row_mask):
+    runs, start = [], None
+    for col in range(SEATS_PER_ROW + 1):
+        free = col < SEATS_PER_ROW and not row_mask >> col & 1
+        if free and start is None:
+            start = col
+        elif not free and start is not None:
+            runs.append((start, col - start))
+            start = None
+    return tuple(runs)
+
+
+def _centred_start(run_start, run_length, count):
+    # Position du bloc de `count` sièges la plus proche du centre de la rangée, dans la plage libre.
+    ideal = round(ROW_CENTRE - (count - 1) / 2)
+    return min(max(ideal, run_start), run_start + run_length - count)
+
+
+def _best_starts(runs):
+    starts = [-1] * (SEATS_PER_ROW + 1)
+    for count in range(1, SEATS_PER_ROW + 1):
+        best = None
+        for run_start, run_length in runs:
+            if run_length >= count:
+                start = _centred_start(run_start, run_length, count)
+                offset = abs(start + (count - 1) / 2 - ROW_CENTRE)
+                if best is None or offset < best[0]:
+                    best = (offset, start)
+        if best is not None:
+            starts[count] = best[1]
+    return tuple(starts)
+
+
+# Tables pour les 256 masques de rangée possibles.
+FREE_RUNS = tuple(_free_runs(m) for m in range(1 << SEATS_PER_ROW))
+BEST_START = tuple(_best_starts(runs) for runs in FREE_RUNS)
+
+
+@lru_cache(maxsize=None)
+def hall_layout(capacity):
+    """(rows, bits to set for the seats missing from the last row, rows in order of preference)."""
+    capacity = max(0, min(capacity, MAX_SEATS))
+    rows = -(-capacity // SEATS_PER_ROW)
+    missing = ((1 << (rows * SEATS_PER_ROW)) - 1) & ~((1 << capacity) - 1)
+    # Les rangées préférées sont aux deux tiers de la salle, puis on s'en éloigne.
+    ideal = (rows - 1) * 2 / 3
+    order = tuple(sorted(range(rows), key=lambda row: (abs(row - ideal), -row)))
+    return rows, missing, order
+
+
+def _block(row, start, count):
+    first = row * SEATS_PER_ROW + start
+    return [seat_label(index) for index in range(first, first + count)]
+
+
+def best_seats(occupied, capacity, count):
+    """
+    Pick `count` free seats in a hall of `capacity` seats, given the occupied bitmask.
+    Returns (seats, contiguous): one block in the best row when possible, otherwise the fewest
+    blocks that seat the whole party. Returns ([], False) when there are not enough free seats.
+    """
+    if count < 1:
+        return [], False
+    rows, missing, order = hall_layout(capacity)
+    # Une rangée fait 8 sièges : chaque octet du bitmap est le masque d'une rangée.
+    masks = ((occupied | missing) & ((1 << (rows * SEATS_PER_ROW)) - 1)).to_bytes(rows, 'little')
+    if count <= SEATS_PER_ROW:
+        for row in order:
+            start = BEST_START[masks[row]][count]
+            if start >= 0:
+                return _block(row, start, count), True
+
+    # Repli : plages libres rangées par longueur, chacune dans l'ordre de préférence des rangées.
+    # On prend la plus longue tant qu'aucune ne suffit, puis la meilleure plage qui suffit pour la fin.
+    buckets = [[] for _ in range(SEATS_PER_ROW + 1)]
+    free = 0
+    for rank, row in enumerate(order):
+        for start, length in FREE_RUNS[masks[row]]:
+            buckets[length].append((rank, row, start))
+            free += length
+    if free < count:
+        return [], False
+    seats, remaining = [], count
+    while remaining:
+        if remaining <= SEATS_PER_ROW:
+            fitting = [(bucket[0], length) for length, bucket in enumerate(buckets[remaining:], remaining) if bucket]
+            if fitting:
+                (_, row, start), length = min(fitting)
+                seats += _block(row, _centred_start(start, length, remaining), remaining)
+                break
+        length = max(length for length, bucket in enumerate(buckets) if bucket)
+        _, row, start = buckets[length].pop(0)
+        seats += _block(row, start, length)
+        remaining -= length
+    seats.sort(key=lambda seat: (ROW_LABELS.index(seat[0]), int(seat[1:])))
+    return seats, False
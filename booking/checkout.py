@@ -0,0 +1,34 @@
+import random
+import time
+from django.conf import settings
+from django.db import OperationalError, transaction
+from .models import Booking
+
+# Achat de sièges : une transaction par tentative, relancée avec un délai croissant quand SQLite
+# répond "database is locked" malgré son délai d'attente (trop d'acheteurs en même temps).
+
+
+def _is_lock_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def place_booking(user, show_obj, show_date, seat_num):
+    """
+    Create the booking atomically. Raises ValidationError when a seat is invalid or already sold,
+    OperationalError when the database stayed locked through every retry.
+    """
+    # Date convertie ici (ValidationError si invalide) : la réservation rendue porte une vraie date,
+    # sans relire la ligne pour le reçu.
+    show_date = Booking._meta.get_field('show_date').to_python(show_date)
+    attempts = getattr(settings, 'CHECKOUT_RETRIES', 5)
+    backoff = getattr(settings, 'CHECKOUT_RETRY_BACKOFF', 0.05)
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return Booking.objects.create(user=user, show=show_obj, show_date=show_date, seat_num=seat_num)
+        except OperationalError as exc:
+            if not _is_lock_error(exc) or attempt == attempts - 1:
+                raise
+        # Délai exponentiel avec gigue : les acheteurs en conflit ne se réveillent pas ensemble.
+        time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+# Diffusion en mémoire des changements de sièges vers les abonnés SSE d'un même processus ASGI.
+# Chaque abonné possède une asyncio.Queue ; publish() peut être appelé depuis n'importe quel thread.
+QUEUE_SIZE = 100
+
+
+def channel_name(show_id, show_date):
+    return f"{show_id}:{show_date}"
+
+
+def _deliver(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Abonné trop lent : on vide sa file et on lui demande de recharger le plan de salle.
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({'resync': True})
+
+
+class SeatEventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:
+                # La boucle de l'abonné est fermée : il sera retiré à la fin de son flux.
+                pass
+
+
+broker = SeatEventBroker()
+
+
+def publish_seat_change(show_id, show_date, occupied=(), available=()):
+    """Push a seat-state delta to everyone watching this show/date."""
+    if not occupied and not available:
+        return
+    broker.publish(channel_name(show_id, show_date), {
+        'occupied': list(occupied),
+        'available': list(available),
+    })
@@ -0,0 +1,106 @@
+from datetime import date
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.dateparse import parse_date
+from .seatmap import MAX_SEATS, seat_label, seats_to_mask
+from .events import publish_seat_change
+
+# Réservations temporaires de sièges pendant le choix et le paiement.
+# Chaque siège retenu est une clé de cache qui expire seule : aucun nettoyage en base n'est nécessaire.
+ALL_SEATS = [seat_label(i) for i in range(MAX_SEATS)]
+
+
+def hold_ttl():
+    return getattr(settings, 'SEAT_HOLD_TTL', 300)
+
+
+def _show_part(show_id, show_date):
+    # Même clé pour une date reçue en chaîne (« 2025-6-1 ») ou en objet date, comme versions._date_key.
+    # Les vues valident séance et date ; une valeur manquante ou illisible lève ValueError.
+    if not isinstance(show_date, date):
+        show_date = parse_date(show_date or '')
+        if show_date is None:
+            raise ValueError("Invalid show date")
+    try:
+        show_id = int(show_id)
+    except TypeError as e:
+        raise ValueError("Invalid show id") from e
+    return f"{show_id}:{show_date.isoformat()}"
+
+
+def _seat_key(show_id, show_date, seat):
+    return f"seathold:{_show_part(show_id, show_date)}:{seat}"
+
+
+def _owner_key(show_id, show_date, owner):
+    return f"seathold-owner:{_show_part(show_id, show_date)}:{owner}"
+
+
+def _active_key(show_id, show_date):
+    # Présent tant qu'au moins un siège peut être retenu : évite de lire toutes les clés sinon.
+    return f"seathold-active:{_show_part(show_id, show_date)}"
+
+
+def _hold_keys(show_id, show_date):
+    part = _show_part(show_id, show_date)
+    return {f"seathold:{part}:{seat}": seat for seat in ALL_SEATS}
+
+
+def held_seats(show_id, show_date, exclude_owner=None):
+    """Bitmask of seats currently held for a show/date, ignoring those held by `exclude_owner`."""
+    if cache.get(_active_key(show_id, show_date)) is None:
+        return 0
+    keys = _hold_keys(show_id, show_date)
+    held = cache.get_many(keys)
+    return seats_to_mask(keys[key] for key, owner in held.items() if owner != exclude_owner)
+
+
+async def aheld_seats(show_id, show_date, exclude_owner=None):
+    if await cache.aget(_active_key(show_id, show_date)) is None:
+        return 0
+    keys = _hold_keys(show_id, show_date)
+    held = await cache.aget_many(keys)
+    return seats_to_mask(keys[key] for key, owner in held.items() if owner != exclude_owner)
+
+
+def hold_seats(show_id, show_date, seats, owner, unavailable_mask=0):
+    """
+    Make `seats` the owner's hold for this show/date, releasing seats it no longer wants.
+    Seats in `unavailable_mask` (already sold) or held by someone else are skipped.
+    Returns (held, unavailable) lists of seat labels.
+    Other viewers of the seat map are told about newly held and released seats.
+    """
+    ttl = hold_ttl()
+    previous = cache.get(_owner_key(show_id, show_date, owner)) or []
+    held, unavailable, released = [], [], []
+    for seat in seats:
+        key = _seat_key(show_id, show_date, seat)
+        if unavailable_mask & seats_to_mask([seat]):
+            unavailable.append(seat)
+        # cache.add est atomique : un seul client obtient le siège.
+        elif cache.add(key, owner, ttl) or cache.get(key) == owner:
+            cache.touch(key, ttl)
+            held.append(seat)
+        else:
+            unavailable.append(seat)
+
+    for seat in previous:
+        if seat not in held:
+            key = _seat_key(show_id, show_date, seat)
+            if cache.get(key) == owner:
+                cache.delete(key)
+                if not unavailable_mask & seats_to_mask([seat]):
+                    released.append(seat)
+
+    if held:
+        cache.set(_owner_key(show_id, show_date, owner), held, ttl)
+        cache.set(_active_key(show_id, show_date), True, ttl)
+    else:
+        cache.delete(_owner_key(show_id, show_date, owner))
+    publish_seat_change(show_id, show_date, occupied=[seat for seat in held if seat not in previous], available=released)
+    return held, unavailable
+
+
+def release_holds(show_id, show_date, owner, sold_mask=0):
+    # Les sièges de sold_mask viennent d'être vendus : ils ne sont pas annoncés comme libres.
+    hold_seats(show_id, show_date, [], owner, unavailable_mask=sold_mask)
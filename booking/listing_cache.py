@@ -0,0 +1,68 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from staff.catalogue import catalogue_version
+from movieticket_new.db_router import use_primary
+
+# Cache des pages publiques (accueil, détail d'un film, choix de séance).
+# Les clés incluent la version du catalogue et la date du jour : une modification par le staff
+# ou le passage à minuit sélectionne de nouvelles clés, jamais une page obsolète.
+# Ce qui est mis en cache sous ces clés est lu sur la base principale : la version change au commit,
+# une réplica en retard remplirait la nouvelle clé avec l'ancien catalogue jusqu'à expiration.
+
+
+def listing_key(name, *parts):
+    raw = ':'.join(str(part) for part in (catalogue_version(), timezone.localdate(), *parts))
+    return f"listing:{name}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def next_midnight():
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    return timezone.make_aware(datetime.combine(tomorrow, datetime.min.time()))
+
+
+def listing_timeout(expires_at=None):
+    """Seconds to cache a listing: LISTING_CACHE_TIMEOUT, capped so it expires when the first listed show ends."""
+    timeout = getattr(settings, 'LISTING_CACHE_TIMEOUT', 600)
+    if expires_at is not None:
+        timeout = min(timeout, int((expires_at - timezone.now()).total_seconds()))
+    return max(timeout, 0)
+
+
+def is_cacheable_request(request):
+    # Sans cookie de session ni messages, le visiteur est anonyme : pas besoin d'interroger la base.
+    return (
+        request.method == 'GET'
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def cache_listing_page(view):
+    """
+    Cache the whole page for anonymous visitors. The view may set `response.listing_expires_at`
+    (an aware datetime) to expire the entry earlier, e.g. when a listed show ends.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+        key = listing_key('page', request.get_full_path())
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        with use_primary():
+            response = view(request, *args, **kwargs)
+        # Une page qui pose un cookie (jeton CSRF, session...) est propre au visiteur : jamais en cache.
+        if (response.status_code == 200 and not response.streaming and not response.cookies
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')):
+            timeout = listing_timeout(getattr(response, 'listing_expires_at', None))
+            if timeout:
+                cache.set(key, (response.content, response['Content-Type']), timeout)
+        return response
+    return wrapper
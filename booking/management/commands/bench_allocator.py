@@ -0,0 +1,46 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from booking.allocator import best_seats
+from booking.seatmap import MAX_SEATS, SEATS_PER_ROW
+
+
+def naive_block(occupied, capacity, count):
+    # Référence : parcours siège par siège, première plage libre assez longue.
+    for row_start in range(0, capacity, SEATS_PER_ROW):
+        run = 0
+        for index in range(row_start, min(row_start + SEATS_PER_ROW, capacity)):
+            run = 0 if occupied >> index & 1 else run + 1
+            if run == count:
+                return index - count + 1
+    return -1
+
+
+class Command(BaseCommand):
+    help = "Time the group seat allocator on randomly filled halls (microseconds per call)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=MAX_SEATS)
+        parser.add_argument('--halls', type=int, default=2000, help="Random seat maps per fill level.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        capacity, halls = options['capacity'], options['halls']
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"capacity {capacity}, {halls} seat maps per fill level")
+        self.stdout.write(f"{'fill':>6}{'party':>7}{'allocator us':>14}{'naive us':>10}{'contiguous':>12}")
+        for fill in (0.0, 0.5, 0.8, 0.95):
+            maps = [
+                sum(1 << index for index in range(capacity) if rng.random() < fill)
+                for _ in range(halls)
+            ]
+            for count in (2, 4, 6, 12):
+                start = time.perf_counter()
+                results = [best_seats(occupied, capacity, count) for occupied in maps]
+                fast = (time.perf_counter() - start) / halls * 1e6
+                start = time.perf_counter()
+                for occupied in maps:
+                    naive_block(occupied, capacity, count)
+                naive = (time.perf_counter() - start) / halls * 1e6
+                contiguous = sum(1 for _, ok in results if ok) / halls
+                self.stdout.write(f"{fill:>6.0%}{count:>7}{fast:>14.1f}{naive:>10.1f}{contiguous:>12.0%}")
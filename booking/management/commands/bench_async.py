@@ -0,0 +1,72 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, AsyncClient, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from staff.models import show
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare WSGI (thread pool) and ASGI (event loop) throughput of the seat-map JSON endpoints, "
+        "in process, against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show-id', type=int, help="Defaults to the first show.")
+        parser.add_argument('--date', help="Show date (YYYY-MM-DD), defaults to tomorrow.")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help="Worker threads for WSGI, in-flight requests for ASGI.")
+
+    def handle(self, *args, **options):
+        show_obj = show.objects.filter(pk=options['show_id']).first() if options['show_id'] else show.objects.first()
+        if show_obj is None:
+            raise CommandError("No show to benchmark against.")
+        show_date = options['date'] or str(timezone.localdate() + timedelta(days=1))
+        query = {'show_id': show_obj.pk, 'show_date': show_date}
+        total, concurrency = options['requests'], options['concurrency']
+
+        self.stdout.write(f"{total} requests, concurrency {concurrency}, show {show_obj.pk} on {show_date}")
+        self.stdout.write(f"{'endpoint':<16}{'WSGI req/s':>14}{'ASGI req/s':>14}")
+        for name in ('booked_seats', 'show_details', 'availability'):
+            url = reverse(name)
+            # Des milliers de requêtes depuis un seul client : le limiteur de débit est coupé.
+            # Le client de test se présente comme « testserver », absent d'ALLOWED_HOSTS (sinon 400 partout).
+            with override_settings(RATE_LIMITS={}, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                wsgi, wsgi_failed = self.run_wsgi(url, query, total, concurrency)
+                asgi, asgi_failed = asyncio.run(self.run_asgi(url, query, total, concurrency))
+            # Un débit de pages d'erreur ne dit rien de l'endpoint.
+            if wsgi_failed or asgi_failed:
+                raise CommandError(
+                    f"{name}: {wsgi_failed} WSGI and {asgi_failed} ASGI responses were not 200, nothing to compare."
+                )
+            self.stdout.write(f"{name:<16}{wsgi:>14.0f}{asgi:>14.0f}")
+
+    # Chaque mode renvoie (requêtes par seconde, réponses autres que 200).
+    def run_wsgi(self, url, query, total, concurrency):
+        def worker(count):
+            client = Client()
+            return sum(client.get(url, query).status_code != 200 for _ in range(count))
+
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            failed = sum(pool.map(worker, shares))
+        return total / (time.perf_counter() - start), failed
+
+    async def run_asgi(self, url, query, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                return (await client.get(url, query)).status_code != 200
+
+        start = time.perf_counter()
+        failed = sum(await asyncio.gather(*(one() for _ in range(total))))
+        return total / (time.perf_counter() - start), failed
@@ -0,0 +1,113 @@
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.utils import timezone
+from accounts.models import Account
+from booking.checkout import place_booking
+from booking.models import Booking, SeatInventory
+from booking.seatmap import MAX_SEATS, parse_seats, seat_label, seats_to_mask
+from staff.models import show
+
+
+class Command(BaseCommand):
+    help = (
+        "Run many concurrent checkouts for the same show and date, then check that no seat was sold twice. "
+        "Use against a file database (not an in-memory one); the bookings made are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show-id', type=int, help="Defaults to the first show.")
+        parser.add_argument('--date', help="Show date (YYYY-MM-DD), defaults to tomorrow.")
+        parser.add_argument('--buyers', type=int, default=200, help="Parallel buyers (threads).")
+        parser.add_argument('--seats', type=int, default=40,
+                            help="Seats the buyers compete for; fewer seats means more conflicts.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--max-p99', type=float, help="Fail when the p99 checkout time exceeds this (ms).")
+        parser.add_argument('--keep', action='store_true', help="Keep the bookings made by the benchmark.")
+
+    def handle(self, *args, **options):
+        show_obj = (
+            show.objects.filter(pk=options['show_id']).select_related('salle').first() if options['show_id']
+            else show.objects.select_related('salle').first()
+        )
+        if show_obj is None:
+            raise CommandError("No show to benchmark against.")
+        show_date = options['date'] or str(timezone.localdate() + timedelta(days=1))
+        users = list(Account.objects.order_by('pk')[:options['buyers']])
+        if not users:
+            raise CommandError("No user to buy with.")
+
+        # Chaque acheteur veut 1 à 4 sièges parmi un petit ensemble encore libre : les conflits sont voulus.
+        rng = random.Random(options['seed'])
+        sold = SeatInventory.booked_mask(show_obj.pk, show_date)
+        pool = [
+            seat_label(i) for i in range(min(show_obj.salle.capacity, MAX_SEATS)) if not sold >> i & 1
+        ][:options['seats']]
+        if not pool:
+            raise CommandError(f"Show {show_obj.pk} is sold out on {show_date}.")
+        wishes = [
+            (users[n % len(users)], ','.join(rng.sample(pool, min(rng.randint(1, 4), len(pool)))))
+            for n in range(options['buyers'])
+        ]
+        before = set(Booking.objects.filter(show=show_obj, show_date=show_date).values_list('pk', flat=True))
+
+        start_line = threading.Barrier(len(wishes))
+
+        def buy(wish):
+            user, seats = wish
+            start_line.wait()
+            started = time.perf_counter()
+            try:
+                place_booking(user, show_obj, show_date, seats)
+                outcome = 'sold'
+            except ValidationError:
+                outcome = 'conflict'
+            except OperationalError:
+                outcome = 'locked'
+            finally:
+                connection.close()
+            return outcome, time.perf_counter() - started
+
+        self.stdout.write(
+            f"{len(wishes)} buyers, {len(pool)} contested seats, show {show_obj.pk} on {show_date}, "
+            f"database {connection.vendor}"
+        )
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(wishes)) as executor:
+            results = list(executor.map(buy, wishes))
+        wall = time.perf_counter() - began
+
+        outcomes = Counter(outcome for outcome, _ in results)
+        durations = [elapsed * 1000 for _, elapsed in results]
+        quantiles = statistics.quantiles(durations, n=100, method='inclusive') if len(durations) > 1 else durations * 99
+        made = Booking.objects.filter(show=show_obj, show_date=show_date).exclude(pk__in=before)
+        seats_sold = Counter(seat for seat_num in made.values_list('seat_num', flat=True) for seat in parse_seats(seat_num))
+        double_sold = sorted(seat for seat, count in seats_sold.items() if count > 1)
+        inventory = SeatInventory.booked_mask(show_obj.pk, show_date)
+        inventory_ok = inventory & seats_to_mask(seats_sold) == seats_to_mask(seats_sold)
+
+        self.stdout.write(
+            f"sold {outcomes['sold']}, refused (seat taken) {outcomes['conflict']}, "
+            f"failed (database locked) {outcomes['locked']} in {wall:.2f}s"
+        )
+        self.stdout.write(
+            f"checkout p50 {quantiles[49]:.1f} ms, p95 {quantiles[94]:.1f} ms, p99 {quantiles[98]:.1f} ms, "
+            f"max {max(durations):.1f} ms"
+        )
+        self.stdout.write(f"seats sold {len(seats_sold)}, double-sold {len(double_sold)}, inventory consistent: {inventory_ok}")
+
+        if not options['keep']:
+            for booking in made:
+                booking.delete()
+        if double_sold or not inventory_ok:
+            raise CommandError(f"Seats sold twice: {', '.join(double_sold) or 'none'}; inventory consistent: {inventory_ok}.")
+        if options['max_p99'] is not None and quantiles[98] > options['max_p99']:
+            raise CommandError(f"p99 {quantiles[98]:.1f} ms is above {options['max_p99']} ms.")
+        self.stdout.write(self.style.SUCCESS("No seat was sold twice."))
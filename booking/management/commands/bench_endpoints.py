@@ -0,0 +1,193 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Account
+from booking.allocator import best_seats
+from booking.models import Booking, SeatInventory
+from staff.models import ShowOccurrence
+
+ENDPOINTS = ('index', 'show_selection', 'booked_seats', 'show_details', 'checkout', 'my_bookings')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot endpoints in process (latency percentiles, throughput, queries per request). "
+        "Results can be saved as a baseline and compared on later runs; see generate_cinema_data for a dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=1, help="Client threads.")
+        parser.add_argument('--date', help="Show date (YYYY-MM-DD), defaults to tomorrow.")
+        parser.add_argument('--cold', action='store_true', help="Clear the cache before every request.")
+        parser.add_argument('--save', metavar='PATH', help="Write the results to a JSON baseline.")
+        parser.add_argument('--compare', metavar='PATH', help="Compare with a saved baseline.")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed p95 slowdown before a regression is reported (0.2 = 20%%).")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError("--requests must be at least 2.")
+        self.show_date = options['date'] or str(timezone.localdate() + timedelta(days=1))
+        self.show = self.pick_show()
+        user_id = Booking.objects.order_by('-id').values_list('user_id', flat=True).first()
+        self.user = Account.objects.get(pk=user_id) if user_id else Account.objects.first()
+        if self.user is None:
+            raise CommandError("No user to log in with.")
+        self.cold = options['cold']
+
+        self.stdout.write(
+            f"{options['requests']} requests per endpoint, concurrency {options['concurrency']}, "
+            f"show {self.show.pk} on {self.show_date}, user {self.user.pk}{', cold cache' if self.cold else ''}"
+        )
+        self.stdout.write(
+            f"{'endpoint':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'errors':>8}"
+        )
+        results = {}
+        for name in options['endpoints']:
+            # Un seul utilisateur enchaîne des milliers de requêtes : le limiteur de débit est coupé.
+            # Le client de test se présente comme « testserver », absent d'ALLOWED_HOSTS (sinon 400 partout).
+            with override_settings(RATE_LIMITS={}, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                stats = self.run(name, options['requests'], options['warmup'], options['concurrency'])
+            results[name] = stats
+            self.stdout.write(
+                f"{name:<16}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}"
+                f"{stats['throughput']:>9.0f}{stats['queries']:>9.1f}{stats['errors']:>8}"
+            )
+
+        # Des pages d'erreur ne mesurent pas l'endpoint : pas de référence ni de comparaison.
+        failed = [name for name, stats in results.items() if stats['errors']]
+        if failed:
+            raise CommandError(f"Non-2xx responses from {', '.join(failed)}: results not saved or compared.")
+
+        report = {
+            'created': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'cold': self.cold,
+            'results': results,
+        }
+        if options['save']:
+            Path(options['save']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Baseline saved to {options['save']}.")
+        if options['compare']:
+            self.compare(json.loads(Path(options['compare']).read_text()), report, options['tolerance'])
+
+    def pick_show(self):
+        # La première séance du jour qui a encore une place libre (checkout en a besoin).
+        occurrences = list(
+            ShowOccurrence.objects.filter(date=self.show_date).select_related('show__salle').order_by('start_datetime')
+        )
+        if not occurrences:
+            raise CommandError(f"No show on {self.show_date}: run generate_cinema_data or pass --date.")
+        for occurrence in occurrences:
+            show_obj = occurrence.show
+            if best_seats(SeatInventory.booked_mask(show_obj.pk, self.show_date), show_obj.salle.capacity, 1)[0]:
+                return show_obj
+        raise CommandError(f"Every show is sold out on {self.show_date}, pass another --date.")
+
+    def request(self, name, client):
+        if name == 'index':
+            return client.get(reverse('index'))
+        if name == 'show_selection':
+            return client.get(reverse('show_selection'), {'date': self.show_date})
+        if name == 'booked_seats':
+            return client.get(reverse('booked_seats'), {'show_id': self.show.pk, 'show_date': self.show_date})
+        if name == 'show_details':
+            return client.get(reverse('show_details'), {'show_id': self.show.pk})
+        if name == 'my_bookings':
+            return client.get(reverse('my_bookings'))
+        # checkout : une place libre, réservée puis annulée par rollback pour laisser les données intactes.
+        mask = SeatInventory.booked_mask(self.show.pk, self.show_date)
+        seats, _ = best_seats(mask, self.show.salle.capacity, 1)
+        if not seats:
+            raise CommandError(f"Show {self.show.pk} is sold out on {self.show_date}.")
+        with transaction.atomic():
+            response = client.post(reverse('checkout'), {
+                'showid': self.show.pk, 'showdate': self.show_date, 'seats': seats[0],
+            })
+            transaction.set_rollback(True)
+        return response
+
+    def run(self, name, total, warmup, concurrency):
+        # Pages publiques en visiteur anonyme (chemin mis en cache), les autres en utilisateur connecté.
+        anonymous = name in ('index', 'show_selection', 'show_details')
+
+        def client():
+            c = Client()
+            if not anonymous:
+                c.force_login(self.user)
+            return c
+
+        def worker(count):
+            c, samples = client(), []
+            for _ in range(count):
+                if self.cold:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = self.request(name, c)
+                    elapsed = time.perf_counter() - start
+                samples.append((elapsed, len(queries), not 200 <= response.status_code < 300))
+            return samples
+
+        def thread_worker(count):
+            try:
+                return worker(count)
+            finally:
+                connection.close()
+
+        worker(warmup)
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = [sample for chunk in pool.map(thread_worker, shares) for sample in chunk]
+        wall = time.perf_counter() - start
+
+        quantiles = statistics.quantiles([elapsed * 1000 for elapsed, _, _ in samples], n=100, method='inclusive')
+        return {
+            'p50': quantiles[49],
+            'p95': quantiles[94],
+            'p99': quantiles[98],
+            'mean': statistics.fmean(elapsed * 1000 for elapsed, _, _ in samples),
+            'throughput': len(samples) / wall,
+            'queries': statistics.fmean(count for _, count, _ in samples),
+            'errors': sum(1 for _, _, error in samples if error),
+        }
+
+    def compare(self, baseline, report, tolerance):
+        self.stdout.write(f"Compared with the baseline of {baseline.get('created', '?')}:")
+        self.stdout.write(f"{'endpoint':<16}{'p95 ms':>16}{'change':>9}{'queries':>12}")
+        regressions = []
+        for name, stats in report['results'].items():
+            before = baseline.get('results', {}).get(name)
+            if before is None:
+                self.stdout.write(f"{name:<16}{'(not in baseline)':>16}")
+                continue
+            change = stats['p95'] / before['p95'] - 1 if before['p95'] else 0
+            line = (
+                f"{name:<16}{before['p95']:>7.2f} -> {stats['p95']:<6.2f}{change:>+9.0%}"
+                f"{before['queries']:>5.1f} -> {stats['queries']:<4.1f}"
+            )
+            if change > tolerance or stats['queries'] > before['queries']:
+                regressions.append(name)
+                line = self.style.ERROR(line + '  REGRESSION')
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"Regressions against the baseline: {', '.join(regressions)}.")
@@ -0,0 +1,173 @@
+import random
+import time as timer
+from datetime import datetime, time, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from accounts.models import Account
+from booking.allocator import best_seats
+from booking.models import Booking
+from booking.seatmap import MAX_SEATS, seats_to_mask
+from staff.catalogue import bump_catalogue_version
+from staff.models import Salle, film, show, ShowOccurrence
+
+# Données de test : tout ce qui est généré porte ces préfixes pour pouvoir être supprimé avec --clear.
+HALL_PREFIX = 'Bench Hall '
+FILM_PREFIX = 'Bench Film '
+EMAIL_DOMAIN = '@bench.local'
+BENCH_PASSWORD = 'bench-password'
+# Créneaux espacés de 3h30 : aucun film généré (150 min maximum) ne chevauche le suivant.
+SLOT_TIMES = [time(11, 0), time(14, 30), time(18, 0), time(21, 30)]
+PARTY_SIZES = [1, 2, 2, 2, 3, 4, 4, 5, 6]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic cinema (halls, films, months of shows, users and bookings) for load tests. "
+        "Seat inventories, sales rollups and show occurrences are rebuilt afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--halls', type=int, default=10)
+        parser.add_argument('--films', type=int, default=60)
+        parser.add_argument('--months', type=int, default=3, help="Length of the programme.")
+        parser.add_argument('--start', help="First day of the programme (YYYY-MM-DD), defaults to a month ago.")
+        parser.add_argument('--slots', type=int, default=4, choices=range(1, len(SLOT_TIMES) + 1),
+                            help="Shows per hall per day.")
+        parser.add_argument('--run-days', type=int, default=14, help="Days a film stays in the same slot.")
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--bookings', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help="Delete previously generated data first.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if options['clear']:
+            self.clear()
+        elif Salle.objects.filter(name__startswith=HALL_PREFIX).exists():
+            raise CommandError("Generated data already exists, use --clear to replace it.")
+
+        start = (
+            datetime.strptime(options['start'], '%Y-%m-%d').date() if options['start']
+            else timezone.localdate() - timedelta(days=30)
+        )
+        end = start + timedelta(days=30 * options['months'] - 1)
+
+        began = timer.perf_counter()
+        salles, films = self.create_catalogue(options['halls'], options['films'])
+        shows = self.create_shows(salles, films, start, end, options['slots'], options['run_days'])
+        user_ids = self.create_users(options['users'])
+        sold = self.create_bookings(shows, user_ids, options['bookings'])
+
+        self.stdout.write("Rebuilding seat inventories, sales rollups and the search index...")
+        call_command('rebuild_seat_inventory', stdout=self.stdout)
+        call_command('rebuild_sales_rollups', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(salles)} halls, {len(films)} films, {len(shows)} shows from {start} to {end}, "
+            f"{len(user_ids)} users and {sold} bookings in {timer.perf_counter() - began:.1f}s. "
+            f"Users log in as user<n>{EMAIL_DOMAIN} / {BENCH_PASSWORD}."
+        ))
+
+    def clear(self):
+        # Les réservations sont supprimées en SQL : les signaux par réservation (inventaire, cumuls, reçus)
+        # seraient bien trop lents sur des millions de lignes, et inventaires et cumuls sont reconstruits ensuite.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Booking._meta.db_table} WHERE user_id IN "
+                f"(SELECT id FROM {Account._meta.db_table} WHERE email LIKE %s) OR show_id IN "
+                f"(SELECT id FROM {show._meta.db_table} WHERE salle_id IN "
+                f"(SELECT id FROM {Salle._meta.db_table} WHERE name LIKE %s))",
+                [f'%{EMAIL_DOMAIN}', f'{HALL_PREFIX}%'],
+            )
+            Salle.objects.filter(name__startswith=HALL_PREFIX).delete()
+            film.objects.filter(movie_name__startswith=FILM_PREFIX).delete()
+            Account.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+        self.stdout.write("Cleared previously generated data.")
+
+    def create_catalogue(self, halls, films):
+        Salle.objects.bulk_create([
+            Salle(name=f'{HALL_PREFIX}{n}', capacity=self.rng.randrange(80, MAX_SEATS + 1, 8))
+            for n in range(1, halls + 1)
+        ])
+        film.objects.bulk_create([
+            film(
+                movie_name=f'{FILM_PREFIX}{n}',
+                url=f'https://picsum.photos/seed/film{n}/300/450',
+                movie_lang=self.rng.choice(['English', 'French', 'Arabic']),
+                movie_genre=self.rng.choice(['Drama', 'Comedy', 'Action', 'Animation', 'Thriller']),
+                duration=self.rng.randrange(90, 151),
+            )
+            for n in range(1, films + 1)
+        ])
+        # Relues pour avoir les clés primaires, que bulk_create ne renvoie pas sur toutes les bases.
+        return list(Salle.objects.filter(name__startswith=HALL_PREFIX)), list(film.objects.filter(movie_name__startswith=FILM_PREFIX))
+
+    def create_shows(self, salles, films, start, end, slots, run_days):
+        # Chaque créneau de chaque salle enchaîne des films par périodes de run_days jours :
+        # les créneaux ne se chevauchent pas, la validation de show.clean n'est donc pas nécessaire.
+        new_shows = []
+        for salle in salles:
+            for showtime in SLOT_TIMES[:slots]:
+                day = start
+                while day <= end:
+                    last = min(day + timedelta(days=run_days - 1), end)
+                    new_shows.append(show(
+                        movie=self.rng.choice(films), salle=salle, showtime=showtime,
+                        price=self.rng.choice([8, 10, 12, 15]), start_date=day, end_date=last,
+                    ))
+                    day = last + timedelta(days=1)
+        with transaction.atomic():
+            show.objects.bulk_create(new_shows, batch_size=self.batch_size)
+            shows = list(show.objects.filter(salle__in=salles).select_related('movie', 'salle'))
+            ShowOccurrence.rebuild(shows)
+        return shows
+
+    def create_users(self, count):
+        # Un seul hachage pour tous les comptes : le hacheur de mot de passe domine sinon la génération.
+        password = make_password(BENCH_PASSWORD)
+        for first in range(1, count + 1, self.batch_size):
+            Account.objects.bulk_create([
+                Account(email=f'user{n}{EMAIL_DOMAIN}', username=f'bench{n}', password=password)
+                for n in range(first, min(first + self.batch_size, count + 1))
+            ])
+        return list(Account.objects.filter(email__endswith=EMAIL_DOMAIN).values_list('id', flat=True))
+
+    def create_bookings(self, shows, user_ids, count):
+        # Les sièges de chaque séance sont suivis en mémoire et choisis par l'allocateur de groupes :
+        # aucune place n'est vendue deux fois et les salles se remplissent comme en vrai, par blocs.
+        occurrences = [
+            (s, s.start_date + timedelta(days=offset), s.salle.capacity)
+            for s in shows for offset in range((s.end_date - s.start_date).days + 1)
+        ]
+        if not occurrences or not user_ids:
+            return 0
+        masks, sold, attempts = {}, 0, 0
+        while sold < count and attempts < count * 3:
+            batch = []
+            while len(batch) < self.batch_size and sold + len(batch) < count and attempts < count * 3:
+                attempts += 1
+                show_obj, show_date, capacity = self.rng.choice(occurrences)
+                key = (show_obj.id, show_date)
+                seats, _ = best_seats(masks.get(key, 0), capacity, self.rng.choice(PARTY_SIZES))
+                if not seats:
+                    continue
+                masks[key] = masks.get(key, 0) | seats_to_mask(seats)
+                batch.append(Booking(
+                    user_id=self.rng.choice(user_ids), show_id=show_obj.id,
+                    show_date=show_date, seat_num=','.join(seats), price=show_obj.price,
+                ))
+            if not batch:
+                break
+            Booking.objects.bulk_create(batch, batch_size=self.batch_size)
+            sold += len(batch)
+            self.stdout.write(f"  {sold} bookings", ending='\r')
+        self.stdout.write('')
+        if sold < count:
+            self.stdout.write(self.style.WARNING(f"Halls are full: only {sold} of {count} bookings were created."))
+        return sold
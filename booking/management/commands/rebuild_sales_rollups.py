@@ -0,0 +1,41 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from booking.models import Booking, ShowSales, FilmDailySales, SalleDailySales
+from booking.seatmap import parse_seats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per show/date, film/day and salle/day sales rollups from existing bookings."
+
+    def handle(self, *args, **options):
+        by_show, by_film, by_salle = defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0])
+        # Prix payé à l'achat ; celui de la séance seulement pour les réservations qui ne l'ont pas enregistré.
+        rows = Booking.objects.annotate(paid=Coalesce('price', 'show__price')).values_list(
+            'show_id', 'show_date', 'show__movie_id', 'show__salle_id', 'paid', 'seat_num'
+        ).iterator(chunk_size=5000)
+        for show_id, show_date, film_id, salle_id, price, seat_num in rows:
+            seats = len(parse_seats(seat_num))
+            for totals in (by_show[(show_id, show_date)], by_film[(film_id, show_date)], by_salle[(salle_id, show_date)]):
+                totals[0] += seats
+                totals[1] += seats * price
+
+        with transaction.atomic():
+            for model in (ShowSales, FilmDailySales, SalleDailySales):
+                model.objects.all().delete()
+            ShowSales.objects.bulk_create(
+                [ShowSales(show_id=k[0], show_date=k[1], seats_sold=v[0], revenue=v[1]) for k, v in by_show.items()],
+                batch_size=1000,
+            )
+            FilmDailySales.objects.bulk_create(
+                [FilmDailySales(film_id=k[0], date=k[1], seats_sold=v[0], revenue=v[1]) for k, v in by_film.items()],
+                batch_size=1000,
+            )
+            SalleDailySales.objects.bulk_create(
+                [SalleDailySales(salle_id=k[0], date=k[1], seats_sold=v[0], revenue=v[1]) for k, v in by_salle.items()],
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(by_show)} show, {len(by_film)} film and {len(by_salle)} salle rollups."
+        ))
@@ -0,0 +1,26 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from booking.models import Booking, SeatInventory
+from booking.seatmap import parse_seats, seats_to_mask, mask_to_bytes
+from booking.versions import bump_all_seatmaps
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-(show, date) seat bitmaps from existing bookings."
+
+    def handle(self, *args, **options):
+        masks = defaultdict(int)
+        rows = Booking.objects.values_list('show_id', 'show_date', 'seat_num').iterator(chunk_size=5000)
+        for show_id, show_date, seat_num in rows:
+            masks[(show_id, show_date)] |= seats_to_mask(parse_seats(seat_num))
+
+        with transaction.atomic():
+            SeatInventory.objects.all().delete()
+            SeatInventory.objects.bulk_create(
+                [SeatInventory(show_id=show_id, show_date=show_date, bitmap=mask_to_bytes(mask))
+                 for (show_id, show_date), mask in masks.items()],
+                batch_size=1000,
+            )
+            transaction.on_commit(bump_all_seatmaps)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(masks)} seat inventories."))
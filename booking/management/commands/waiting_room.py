@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from booking.admission import cache_is_shared, close_room, open_room, room_status
+from staff.models import show
+
+
+class Command(BaseCommand):
+    help = (
+        "Open, close or inspect the waiting room of a show. While it is open, only buyers admitted "
+        "from the queue (at most --capacity at a time) can hold seats and check out. "
+        "The room lives in the default cache, so this command needs a cache shared with the server "
+        "(Redis, Memcached, database...). With LocMemCache it refuses to run: use the staff "
+        "Waiting rooms page instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['open', 'close', 'status'])
+        parser.add_argument('show_id', type=int)
+        parser.add_argument('--capacity', type=int, default=50, help="Buyers admitted at the same time.")
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            # Ce processus a son propre LocMemCache : le serveur ne verrait jamais la salle ouverte.
+            raise CommandError(
+                "The default cache is local to each process, so the running server would not see this change. "
+                "Configure a shared cache backend (Redis, Memcached or the database cache) or use the staff "
+                "Waiting rooms page."
+            )
+        show_id = options['show_id']
+        if not show.objects.filter(pk=show_id).exists():
+            raise CommandError(f"Show {show_id} does not exist.")
+        if options['action'] == 'open':
+            if options['capacity'] < 1:
+                raise CommandError("--capacity must be at least 1.")
+            open_room(show_id, options['capacity'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Waiting room open for show {show_id}: {options['capacity']} buyer(s) at a time."
+            ))
+        elif options['action'] == 'close':
+            close_room(show_id)
+            self.stdout.write(self.style.SUCCESS(f"Waiting room closed for show {show_id}."))
+        else:
+            status = room_status(show_id)
+            if status is None:
+                self.stdout.write(f"Show {show_id} has no waiting room.")
+                return
+            capacity, buying, issued, head = status
+            self.stdout.write(
+                f"Show {show_id}: {buying}/{capacity} buyer(s) admitted, {issued} ticket(s) issued, "
+                f"up to {max(issued - head + 1, 0)} waiting."
+            )
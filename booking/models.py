@@ -1,14 +1,145 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.conf import settings
-from staff.models import show, Salle
+from staff.models import show, Salle, film
 from django.core.exceptions import ValidationError
-import re
+from .events import publish_seat_change
+from .versions import bump_seatmap_version
+from .seatmap import (
+    SEATS_PER_ROW, ROW_LABELS, SEAT_PATTERN,
+    parse_seats, seats_to_mask, mask_to_seats, mask_to_bytes, bytes_to_mask,
+)
+
+class SeatInventory(models.Model):
+    # Bitmap des sièges vendus pour une séance à une date donnée (bit i = siège seat_label(i)).
+    show = models.ForeignKey(show, on_delete=models.CASCADE)
+    show_date = models.DateField()
+    bitmap = models.BinaryField(default=b'')
+    # Incrémentée à chaque changement du bitmap (contrôle de concurrence optimiste).
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['show', 'show_date'], name='unique_seat_inventory'),
+        ]
+
+    def __str__(self):
+        return f"Seats sold for show {self.show_id} on {self.show_date}"
+
+    @property
+    def mask(self):
+        return bytes_to_mask(self.bitmap)
+
+    @classmethod
+    def booked_mask(cls, show_id, show_date):
+        bitmap = cls.objects.filter(show_id=show_id, show_date=show_date).values_list('bitmap', flat=True).first()
+        return bytes_to_mask(bitmap)
+
+    @classmethod
+    async def abooked_mask(cls, show_id, show_date):
+        bitmap = await cls.objects.filter(show_id=show_id, show_date=show_date).values_list('bitmap', flat=True).afirst()
+        return bytes_to_mask(bitmap)
+
+    @classmethod
+    def _change_mask(cls, show_id, show_date, change, create):
+        # Mise à jour optimiste : la ligne n'est modifiée que si sa version n'a pas bougé depuis la lecture,
+        # sinon on relit et on recommence. Aucun verrou de ligne n'est gardé pendant le calcul.
+        while True:
+            row = cls.objects.filter(show_id=show_id, show_date=show_date).values_list('pk', 'bitmap', 'version').first()
+            if row is None:
+                if not create:
+                    return
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(show_id=show_id, show_date=show_date, bitmap=mask_to_bytes(change(0)), version=1)
+                    return
+                except IntegrityError:
+                    continue
+            pk, bitmap, version = row
+            bitmap = mask_to_bytes(change(bytes_to_mask(bitmap)))
+            if cls.objects.filter(pk=pk, version=version).update(bitmap=bitmap, version=version + 1):
+                return
+
+    @classmethod
+    def reserve(cls, show_id, show_date, mask):
+        """Mark `mask` as sold, raising ValidationError if any of those seats already is."""
+        def take(current):
+            if current & mask:
+                raise ValidationError(f"Seat(s) {', '.join(mask_to_seats(current & mask))} already booked for this show.")
+            return current | mask
+
+        with transaction.atomic():
+            cls._change_mask(show_id, show_date, take, create=True)
+            transaction.on_commit(lambda: bump_seatmap_version(show_id, show_date))
+            transaction.on_commit(lambda: publish_seat_change(show_id, show_date, occupied=mask_to_seats(mask)))
+
+    @classmethod
+    def release(cls, show_id, show_date, mask):
+        # Ne crée jamais de ligne : la séance peut être en cours de suppression (cascade).
+        with transaction.atomic():
+            cls._change_mask(show_id, show_date, lambda current: current & ~mask, create=False)
+            transaction.on_commit(lambda: bump_seatmap_version(show_id, show_date))
+            transaction.on_commit(lambda: publish_seat_change(show_id, show_date, available=mask_to_seats(mask)))
+
+# Agrégats des ventes (sièges vendus et recette), mis à jour à chaque réservation ou annulation.
+class ShowSales(models.Model):
+    show = models.ForeignKey(show, on_delete=models.CASCADE)
+    show_date = models.DateField()
+    seats_sold = models.IntegerField(default=0)
+    revenue = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['show', 'show_date'], name='unique_show_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['show_date']),
+        ]
+
+class FilmDailySales(models.Model):
+    film = models.ForeignKey(film, on_delete=models.CASCADE)
+    date = models.DateField()
+    seats_sold = models.IntegerField(default=0)
+    revenue = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['film', 'date'], name='unique_film_daily_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+class SalleDailySales(models.Model):
+    salle = models.ForeignKey(Salle, on_delete=models.CASCADE)
+    date = models.DateField()
+    seats_sold = models.IntegerField(default=0)
+    revenue = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['salle', 'date'], name='unique_salle_daily_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
 
 class Booking(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     show = models.ForeignKey(show, on_delete=models.CASCADE)
     show_date = models.DateField()
     seat_num = models.CharField(max_length=100)
+    # Prix d'un siège au moment de l'achat : une annulation retire des agrégats exactement ce qui a été payé,
+    # même si le prix de la séance a changé depuis. Vide pour les réservations antérieures (prix de la séance).
+    price = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'show_date', 'id']),
+        ]
+
+    @property
+    def seat_price(self):
+        return self.price if self.price is not None else self.show.price
 
     def clean(self):
         if not self.seat_num:
@@ -16,13 +147,12 @@ class Booking(models.Model):
         
         seats = self.seat_num.split(',')
         salle_capacity = self.show.salle.capacity
-        seat_pattern = re.compile(r'^[A-Z][1-9][0-9]*$')  # Matches A1, B12, etc.
-        max_seats_per_row = 8  # indiquant qu'il y a 8 sièges par rangée
-        row_labels = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        max_seats_per_row = SEATS_PER_ROW  # indiquant qu'il y a 8 sièges par rangée
+        row_labels = ROW_LABELS
 
         for seat in seats:
             seat = seat.strip()
-            if not seat_pattern.match(seat):
+            if not SEAT_PATTERN.match(seat):
                 raise ValidationError(f"Seat '{seat}' is not in a valid format (e.g., A1, B12).")
             
             row = seat[0]  # e.g., 'C'
@@ -47,6 +177,58 @@ class Booking(models.Model):
             if seat_index > salle_capacity:
                 raise ValidationError(f"Seat '{seat}' exceeds hall capacity of {salle_capacity}.")
 
+        # Vérifie les doublons et les sièges déjà vendus à partir de l'inventaire (une seule ligne lue).
+        requested = parse_seats(self.seat_num)
+        if len(set(requested)) != len(requested):
+            raise ValidationError("Seat numbers must not be repeated.")
+        taken = SeatInventory.booked_mask(self.show_id, self.show_date)
+        if self.pk:
+            previous = Booking.objects.filter(pk=self.pk).values_list('show_id', 'show_date', 'seat_num').first()
+            if previous and previous[0] == self.show_id and str(previous[1]) == str(self.show_date):
+                taken &= ~seats_to_mask(parse_seats(previous[2]))
+        conflict = taken & seats_to_mask(requested)
+        if conflict:
+            raise ValidationError(f"Seat(s) {', '.join(mask_to_seats(conflict))} already booked for this show.")
+
     def save(self, *args, **kwargs):
+        # clean() refuse tôt les sièges déjà vendus ; reserve() revérifie sous contrôle de version,
+        # dans la même transaction que l'insertion, pour qu'un siège ne soit jamais vendu deux fois.
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        if self.price is None:
+            self.price = self.show.price
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Booking.objects.filter(pk=self.pk).values_list('show_id', 'show_date', 'seat_num', 'price').first()
+            super().save(*args, **kwargs)
+            if previous:
+                SeatInventory.release(previous[0], previous[1], seats_to_mask(parse_seats(previous[2])))
+                record_sale(previous[0], previous[1], -len(parse_seats(previous[2])), price=previous[3])
+            SeatInventory.reserve(self.show_id, self.show_date, seats_to_mask(parse_seats(self.seat_num)))
+            record_sale(self.show_id, self.show_date, len(parse_seats(self.seat_num)), show_obj=self.show, price=self.price)
+
+
+def _add_to_rollup(model, lookup, seats, revenue):
+    updated = model.objects.filter(**lookup).update(
+        seats_sold=models.F('seats_sold') + seats,
+        revenue=models.F('revenue') + revenue,
+    )
+    # Une annulation ne crée jamais de ligne : la séance peut être en cours de suppression (cascade).
+    if not updated and seats > 0:
+        model.objects.create(seats_sold=seats, revenue=revenue, **lookup)
+
+
+def record_sale(show_id, show_date, seats, show_obj=None, price=None):
+    """
+    Add (or, with a negative count, remove) `seats` sold for a show/date to every sales rollup,
+    at `price` per seat (the booking's price; the show's current price when unknown).
+    """
+    if show_obj is None:
+        show_obj = show.objects.filter(pk=show_id).only('price', 'movie_id', 'salle_id').first()
+        if show_obj is None:
+            return
+    revenue = seats * (price if price is not None else show_obj.price)
+    with transaction.atomic():
+        _add_to_rollup(ShowSales, {'show_id': show_id, 'show_date': show_date}, seats, revenue)
+        _add_to_rollup(FilmDailySales, {'film_id': show_obj.movie_id, 'date': show_date}, seats, revenue)
+        _add_to_rollup(SalleDailySales, {'salle_id': show_obj.salle_id, 'date': show_date}, seats, revenue)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+from django.conf import settings
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import ParagraphStyle
+
+# Reçus PDF : rendus dans un pool de processus, mis en cache sur disque sous
+# booking_<id>_<empreinte du contenu>.pdf et supprimés quand la réservation est annulée.
+
+_styles = None
+
+
+def _receipt_styles():
+    # Construits une seule fois par processus puis réutilisés pour chaque reçu.
+    global _styles
+    if _styles is None:
+        title_style = ParagraphStyle(
+            name='Title',
+            fontSize=18,
+            spaceAfter=20,
+            alignment=1,
+            textColor=colors.darkblue,
+            fontName='Helvetica-Bold'
+        )
+        normal_style = ParagraphStyle(
+            name='Normal',
+            fontSize=12,
+            spaceAfter=10,
+            fontName='Helvetica'
+        )
+        table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ])
+        _styles = (title_style, normal_style, table_style)
+    return _styles
+
+
+def receipt_data(booking):
+    """Everything printed on the receipt, as plain strings (picklable, hashable)."""
+    show_obj = booking.show
+    total = len(booking.seat_num.split(',')) * booking.seat_price
+    return {
+        'movie': show_obj.movie.movie_name,
+        'hall': show_obj.salle.name,
+        'date': booking.show_date.strftime('%Y-%m-%d'),
+        'showtime': show_obj.showtime.strftime('%I:%M %p'),
+        'seats': booking.seat_num,
+        'total': f"${total:.2f}",
+        'user': booking.user.username,
+        'booking_id': str(booking.id),
+        'booking_date': booking.show_date.strftime('%Y-%m-%d'),
+    }
+
+
+def render_receipt(data):
+    """Build the PDF for `data` (see receipt_data). Runs in the worker processes."""
+    title_style, normal_style, table_style = _receipt_styles()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    table = Table([
+        ["Movie:", data['movie']],
+        ["Hall:", data['hall']],
+        ["Date:", data['date']],
+        ["Showtime:", data['showtime']],
+        ["Seats:", data['seats']],
+        ["Total:", data['total']],
+        ["User:", data['user']],
+        ["Booking ID:", data['booking_id']],
+        ["Booking Date:", data['booking_date']],
+    ], colWidths=[100, 300])
+    table.setStyle(table_style)
+    doc.build([
+        Paragraph("Morro_Cine Booking Receipt", title_style),
+        Spacer(1, 12),
+        table,
+        Spacer(1, 20),
+        Paragraph("Thank you for booking with Morro_Cine!", normal_style),
+        Paragraph("Contact us at support@Morro_Cine.com", normal_style),
+    ])
+    return buffer.getvalue()
+
+
+def receipt_dir():
+    return Path(getattr(settings, 'RECEIPT_CACHE_DIR', settings.BASE_DIR / 'receipts'))
+
+
+def receipt_path(data):
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+    return receipt_dir() / f"booking_{data['booking_id']}_{digest}.pdf"
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = {}
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=getattr(settings, 'RECEIPT_WORKERS', 2))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def _write(path, pdf):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_bytes(pdf)
+    os.replace(tmp, path)
+
+
+def _submit(data):
+    path = receipt_path(data)
+    with _pool_lock:
+        future = _pending.get(path)
+    if future is not None:
+        return path, future
+    try:
+        future = _get_pool().submit(render_receipt, data)
+    except (BrokenProcessPool, RuntimeError):
+        _reset_pool()
+        future = _get_pool().submit(render_receipt, data)
+
+    def done(f):
+        try:
+            if not f.exception():
+                _write(path, f.result())
+        finally:
+            with _pool_lock:
+                _pending.pop(path, None)
+
+    with _pool_lock:
+        _pending[path] = future
+    future.add_done_callback(done)
+    return path, future
+
+
+def warm_receipt(booking):
+    """Start rendering a booking's receipt in the background so the first download is a cache hit."""
+    data = receipt_data(booking)
+    if not receipt_path(data).exists():
+        _submit(data)
+
+
+def get_receipt(booking, timeout=30):
+    """Path of the cached receipt PDF, rendering it in the pool if needed."""
+    data = receipt_data(booking)
+    path = receipt_path(data)
+    if path.exists():
+        return path
+    future = None
+    try:
+        _, future = _submit(data)
+        pdf = future.result(timeout=timeout)
+    except Exception as exc:
+        # Pool cassé, rendu trop long ou erreur dans le processus : on oublie ce rendu (la requête
+        # suivante ne l'attendra pas) et on rend le reçu ici même.
+        if future is not None:
+            future.cancel()
+            with _pool_lock:
+                if _pending.get(path) is future:
+                    del _pending[path]
+        if isinstance(exc, BrokenProcessPool):
+            _reset_pool()
+        pdf = render_receipt(data)
+    if not path.exists():
+        _write(path, pdf)
+    return path
+
+
+def invalidate_receipts(booking_id):
+    for path in receipt_dir().glob(f"booking_{booking_id}_*.pdf"):
+        path.unlink(missing_ok=True)
@@ -0,0 +1,53 @@
+import re
+
+# Disposition des salles : 8 sièges par rangée, rangées A à Z, limitée par Salle.capacity.
+SEATS_PER_ROW = 8
+ROW_LABELS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+MAX_SEATS = SEATS_PER_ROW * len(ROW_LABELS)
+SEAT_PATTERN = re.compile(r'^[A-Z][1-9][0-9]*$')  # Matches A1, B12, etc.
+
+
+def parse_seats(seat_num):
+    """Split a comma-separated seat string ("A1,A2") into stripped labels."""
+    return [seat.strip() for seat in (seat_num or '').split(',') if seat.strip()]
+
+
+def is_seat_label(seat):
+    """True for labels that fit the row layout (A1 to Z8), whatever the hall capacity."""
+    return bool(SEAT_PATTERN.match(seat)) and 1 <= int(seat[1:]) <= SEATS_PER_ROW
+
+
+def seat_index(seat):
+    """Bit position of a seat label: A1 -> 0, A8 -> 7, B1 -> 8."""
+    return ROW_LABELS.index(seat[0]) * SEATS_PER_ROW + int(seat[1:]) - 1
+
+
+def seat_label(index):
+    row, col = divmod(index, SEATS_PER_ROW)
+    return f"{ROW_LABELS[row]}{col + 1}"
+
+
+def seats_to_mask(seats):
+    mask = 0
+    for seat in seats:
+        mask |= 1 << seat_index(seat)
+    return mask
+
+
+def mask_to_seats(mask):
+    seats = []
+    index = 0
+    while mask:
+        if mask & 1:
+            seats.append(seat_label(index))
+        mask >>= 1
+        index += 1
+    return seats
+
+
+def mask_to_bytes(mask):
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+def bytes_to_mask(data):
+    return int.from_bytes(bytes(data or b''), 'little')
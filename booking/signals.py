@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Booking, SeatInventory, record_sale
+from .seatmap import parse_seats, seats_to_mask
+from .receipts import invalidate_receipts
+from .versions import bump_show_version
+from staff.models import show, Salle
+
+# Libère les sièges dans l'inventaire quand une réservation est annulée (ou supprimée en cascade).
+@receiver(post_delete, sender=Booking)
+def release_booked_seats(sender, instance, **kwargs):
+    SeatInventory.release(instance.show_id, instance.show_date, seats_to_mask(parse_seats(instance.seat_num)))
+    record_sale(instance.show_id, instance.show_date, -len(parse_seats(instance.seat_num)), price=instance.price)
+
+
+# Supprime les reçus PDF en cache d'une réservation annulée.
+@receiver(post_delete, sender=Booking)
+def delete_cached_receipts(sender, instance, **kwargs):
+    invalidate_receipts(instance.pk)
+
+
+# Une séance ou une salle modifiée change son plan (capacité, salle) : les ETags des plans sont renouvelés.
+@receiver(post_save, sender=show)
+@receiver(post_delete, sender=show)
+def invalidate_show_seatmaps(sender, instance, **kwargs):
+    # pk lu tout de suite : après une suppression, instance.pk vaut None au moment du commit.
+    show_id = instance.pk
+    transaction.on_commit(lambda: bump_show_version(show_id))
+
+
+@receiver(post_save, sender=Salle)
+def invalidate_salle_seatmaps(sender, instance, **kwargs):
+    show_ids = list(show.objects.filter(salle=instance).values_list('pk', flat=True))
+    transaction.on_commit(lambda: [bump_show_version(show_id) for show_id in show_ids])
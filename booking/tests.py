@@ -1,3 +1,191 @@
-from django.test import TestCase
+import random
+from datetime import date, time, timedelta
+from io import StringIO
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from accounts.models import Account
+from staff.models import Salle, film, show
+from .allocator import ROW_CENTRE, best_seats, hall_layout
+from .models import Booking, FilmDailySales, SalleDailySales, SeatInventory, ShowSales
+from .seatmap import SEATS_PER_ROW, bytes_to_mask, mask_to_bytes, mask_to_seats, seat_index, seats_to_mask
 
-# Create your tests here.
+
+def make_show(capacity=50, price=10):
+    salle = Salle.objects.create(name='H1', capacity=capacity)
+    movie = film.objects.create(movie_name='F', url='http://example.com/f.jpg', duration=120)
+    return show.objects.create(
+        movie=movie, salle=salle, showtime=time(18), price=price,
+        start_date=date.today(), end_date=date.today() + timedelta(days=10),
+    )
+
+
+class SeatMapTests(TestCase):
+    def test_mask_round_trip(self):
+        seats = ['A1', 'A8', 'B1', 'F3', 'Z8']
+        mask = seats_to_mask(seats)
+        self.assertEqual(mask_to_seats(mask), seats)
+        self.assertEqual(bytes_to_mask(mask_to_bytes(mask)), mask)
+        self.assertEqual(bytes_to_mask(None), 0)
+
+
+class SeatInventoryTests(TestCase):
+    def setUp(self):
+        self.show = make_show()
+        self.date = date.today() + timedelta(days=1)
+
+    def test_reserve_and_release(self):
+        SeatInventory.reserve(self.show.id, self.date, seats_to_mask(['A1', 'A2']))
+        SeatInventory.reserve(self.show.id, self.date, seats_to_mask(['B5']))
+        self.assertEqual(mask_to_seats(SeatInventory.booked_mask(self.show.id, self.date)), ['A1', 'A2', 'B5'])
+        SeatInventory.release(self.show.id, self.date, seats_to_mask(['A2']))
+        self.assertEqual(mask_to_seats(SeatInventory.booked_mask(self.show.id, self.date)), ['A1', 'B5'])
+        # Une autre date de la même séance a son propre inventaire.
+        self.assertEqual(SeatInventory.booked_mask(self.show.id, self.date + timedelta(days=1)), 0)
+
+    def test_reserve_rejects_sold_seats(self):
+        SeatInventory.reserve(self.show.id, self.date, seats_to_mask(['A1', 'A2']))
+        with self.assertRaisesMessage(ValidationError, 'A2'):
+            SeatInventory.reserve(self.show.id, self.date, seats_to_mask(['A2', 'A3']))
+        # Rien n'est pris quand un seul des sièges demandés est déjà vendu.
+        self.assertEqual(mask_to_seats(SeatInventory.booked_mask(self.show.id, self.date)), ['A1', 'A2'])
+
+    def test_release_never_creates_a_row(self):
+        SeatInventory.release(self.show.id, self.date, seats_to_mask(['A1']))
+        self.assertFalse(SeatInventory.objects.exists())
+
+    def test_bookings_keep_the_inventory_in_sync(self):
+        user = Account.objects.create_user('a@example.com', 'a', 'pw')
+        booking = Booking.objects.create(user=user, show=self.show, show_date=self.date, seat_num='A1,A2')
+        with self.assertRaises(ValidationError):
+            Booking.objects.create(user=user, show=self.show, show_date=self.date, seat_num='A2,A3')
+        booking.seat_num = 'A2,A3'
+        booking.save()
+        self.assertEqual(mask_to_seats(SeatInventory.booked_mask(self.show.id, self.date)), ['A2', 'A3'])
+        booking.delete()
+        self.assertEqual(SeatInventory.booked_mask(self.show.id, self.date), 0)
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.show = make_show(price=10)
+        self.date = date.today() + timedelta(days=1)
+        self.user = Account.objects.create_user('a@example.com', 'a', 'pw')
+
+    def totals(self):
+        return [
+            list(model.objects.values_list('seats_sold', 'revenue'))
+            for model in (ShowSales, FilmDailySales, SalleDailySales)
+        ]
+
+    def test_book_and_cancel(self):
+        first = Booking.objects.create(user=self.user, show=self.show, show_date=self.date, seat_num='A1,A2')
+        self.assertEqual(self.totals(), [[(2, 20)]] * 3)
+        # Le prix change : la réservation suivante paie le nouveau prix, l'annulation retire l'ancien.
+        self.show.price = 25
+        self.show.save()
+        Booking.objects.create(user=self.user, show=self.show, show_date=self.date, seat_num='B1')
+        self.assertEqual(self.totals(), [[(3, 45)]] * 3)
+        first.delete()
+        self.assertEqual(self.totals(), [[(1, 25)]] * 3)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        booking = Booking.objects.create(user=self.user, show=self.show, show_date=self.date, seat_num='A1,A2')
+        Booking.objects.create(user=self.user, show=self.show, show_date=self.date + timedelta(days=1), seat_num='C3')
+        self.show.price = 12
+        self.show.save()
+        booking.seat_num = 'A1,A2,A3'
+        booking.save()
+        incremental = self.totals()
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        self.assertEqual(
+            [sorted(rows) for rows in self.totals()],
+            [sorted(rows) for rows in incremental],
+        )
+
+
+def brute_force_seats(occupied, capacity, count):
+    """
+    What best_seats must achieve, by trying every position: ('block', row, offset from the centre)
+    for the first row (in order of preference) that fits the party, else ('split', fewest blocks),
+    or None when there are not enough free seats.
+    """
+    rows, missing, order = hall_layout(capacity)
+    taken = occupied | missing
+
+    def free(row, col):
+        return not taken >> (row * SEATS_PER_ROW + col) & 1
+
+    if count <= SEATS_PER_ROW:
+        for row in order:
+            offsets = [
+                abs(start + (count - 1) / 2 - ROW_CENTRE)
+                for start in range(SEATS_PER_ROW - count + 1)
+                if all(free(row, start + k) for k in range(count))
+            ]
+            if offsets:
+                return 'block', row, min(offsets)
+    runs = []
+    for row in range(rows):
+        length = 0
+        for col in range(SEATS_PER_ROW + 1):
+            if col < SEATS_PER_ROW and free(row, col):
+                length += 1
+            elif length:
+                runs.append(length)
+                length = 0
+    runs.sort(reverse=True)
+    if sum(runs) < count:
+        return None
+    blocks, seated = 0, 0
+    while seated < count:
+        seated += runs[blocks]
+        blocks += 1
+    return 'split', blocks
+
+
+def blocks_of(indexes):
+    blocks = []
+    for index in sorted(indexes):
+        if blocks and index == blocks[-1][-1] + 1 and index % SEATS_PER_ROW:
+            blocks[-1].append(index)
+        else:
+            blocks.append([index])
+    return blocks
+
+
+class BestSeatsTests(SimpleTestCase):
+    def test_empty_hall_takes_the_centre_of_the_preferred_row(self):
+        self.assertEqual(best_seats(0, 40, 4), (['D3', 'D4', 'D5', 'D6'], True))
+
+    def test_not_enough_seats(self):
+        self.assertEqual(best_seats(seats_to_mask(['A1', 'A2']), 3, 2), ([], False))
+        self.assertEqual(best_seats(0, 50, 0), ([], False))
+
+    def test_matches_brute_force(self):
+        rng = random.Random(2025)
+        for _ in range(3000):
+            capacity = rng.choice([5, 8, 20, 50, 100, 208])
+            density = rng.random()
+            occupied = sum(1 << i for i in range(capacity) if rng.random() < density)
+            count = rng.randint(1, 12)
+            expected = brute_force_seats(occupied, capacity, count)
+            seats, contiguous = best_seats(occupied, capacity, count)
+            case = (capacity, bin(occupied), count)
+            if expected is None:
+                self.assertEqual((seats, contiguous), ([], False), case)
+                continue
+            indexes = [seat_index(seat) for seat in seats]
+            self.assertEqual(len(set(indexes)), count, case)
+            self.assertTrue(all(index < capacity and not occupied >> index & 1 for index in indexes), case)
+            blocks = blocks_of(indexes)
+            if expected[0] == 'block':
+                _, row, offset = expected
+                self.assertTrue(contiguous, case)
+                self.assertEqual(len(blocks), 1, case)
+                self.assertEqual(indexes[0] // SEATS_PER_ROW, row, case)
+                start = indexes[0] % SEATS_PER_ROW
+                self.assertEqual(abs(start + (count - 1) / 2 - ROW_CENTRE), offset, case)
+            else:
+                self.assertFalse(contiguous, case)
+                self.assertEqual(len(blocks), expected[1], case)
@@ -4,10 +4,20 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('detail/<int:movie_id>/', views.movie_detail, name='movie_detail'),
+    path('search/', views.search, name='search'),
+    path('search/suggest/', views.search_suggest, name='search_suggest'),
     path('show/', views.show_selection, name='show_selection'),
     path('mybookings/', views.my_bookings, name='my_bookings'),
     path('checkout/', views.checkout, name='checkout'),
     path('cancelbooking/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
+    path('img/<str:url_hash>/<int:width>/', views.image_thumb, name='image_thumb'),
+    path('waitingroom/<int:show_id>/', views.waiting_room, name='waiting_room'),
+    path('waitingroom/<int:show_id>/status/', views.waiting_room_status, name='waiting_room_status'),
     path('bookedseats/', views.booked_seats, name='booked_seats'),
+    path('bestseats/', views.best_seats, name='best_seats'),
+    path('holdseats/', views.hold_seats, name='hold_seats'),
+    path('seatevents/', views.seat_events, name='seat_events'),
     path('show_details/', views.show_details, name='show_details'),
+    path('availability/', views.availability, name='availability'),
+    path('availability/day/', views.day_availability, name='day_availability'),
 ]
\ No newline at end of file
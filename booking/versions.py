@@ -0,0 +1,77 @@
+import hashlib
+import uuid
+from datetime import date
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+
+# Jetons de version des plans de salle, gardés en cache pour répondre 304 sans lire la base.
+# Un plan (séance, date) change quand une réservation est créée ou annulée (jeton de la date),
+# quand la séance ou sa salle est modifiée (jeton de la séance) ou après une reconstruction
+# complète de l'inventaire (jeton global). Un jeton évincé est remplacé par un neuf : au pire
+# une réponse complète de plus, jamais un 304 à tort.
+GENERATION_KEY = 'seatmap-generation'
+
+
+def _show_key(show_id):
+    return f"seatmap-show-version:{int(show_id)}"
+
+
+def _date_key(show_id, show_date):
+    # Même clé pour une date reçue en chaîne (« 2025-6-1 ») ou en objet date.
+    if not isinstance(show_date, date):
+        show_date = parse_date(show_date)
+    return f"seatmap-version:{int(show_id)}:{show_date.isoformat()}"
+
+
+def _bump(key):
+    cache.set(key, uuid.uuid4().hex, None)
+
+
+def bump_seatmap_version(show_id, show_date):
+    _bump(_date_key(show_id, show_date))
+
+
+def bump_show_version(show_id):
+    _bump(_show_key(show_id))
+
+
+def bump_all_seatmaps():
+    _bump(GENERATION_KEY)
+
+
+def _keys(show_id, show_date):
+    return [GENERATION_KEY, _show_key(show_id), _date_key(show_id, show_date)]
+
+
+def seatmap_version(show_id, show_date):
+    keys = _keys(show_id, show_date)
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Jeton absent : on en pose un, en gardant celui d'un processus plus rapide.
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+    return ':'.join(str(found[key]) for key in keys)
+
+
+async def aseatmap_version(show_id, show_date):
+    keys = _keys(show_id, show_date)
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, uuid.uuid4().hex, None)
+            found[key] = await cache.aget(key)
+    return ':'.join(str(found[key]) for key in keys)
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def not_modified(request, etag):
+    """A 304 response when the client's If-None-Match already matches `etag`, else None."""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
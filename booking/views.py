@@ -1,65 +1,107 @@
 from django.forms import ValidationError
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from staff.models import film, show, banner, Salle
-from .models import Booking
-from django.http import HttpResponse, JsonResponse
+from staff.models import film, show, banner, Salle, ShowOccurrence
+from .models import Booking, SeatInventory
+from .seatmap import mask_to_seats, parse_seats, seats_to_mask, is_seat_label, bytes_to_mask
+from .holds import held_seats, aheld_seats, hold_seats as take_seat_hold, release_holds, hold_ttl
+from .events import broker, channel_name
+from .receipts import get_receipt, warm_receipt
+from .allocator import best_seats as pick_best_seats
+from .checkout import place_booking
+from .versions import aseatmap_version, make_etag, not_modified
+from .admission import (
+    admitted, cookie_name, join, leave, make_token, poll, poll_interval, rate_limit, read_token, request_ticket,
+    room_capacity,
+)
+from .listing_cache import cache_listing_page, listing_key, listing_timeout, next_midnight
+from staff.catalogue import catalogue_version, acatalogue_version
+from staff.search import search_films, suggest_films
+from staff.thumbnails import FORMATS, ThumbnailError, thumbnail_path, thumbnail_widths
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, FileResponse, Http404, HttpResponseRedirect
+from django.core.handlers.asgi import ASGIRequest
 from datetime import datetime, timedelta, time
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.dateparse import parse_date
+from django.db import OperationalError
+from django.db.models import Q, Case, When, Value
+from staff.pagination import keyset_page
+from movieticket_new.db_router import use_primary
 import re
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from io import BytesIO
+import json
+import asyncio
 
 # qui affiche la page d'accueil avec les bannières et les films disponibles.
+@cache_listing_page
 def index(request): 
-    banners = banner.objects.all()
+    banners = banner.objects.select_related('movie')
     now = timezone.now()
     
-    # Get all films with shows between start_date and end_date
+    # Films projetés aujourd'hui : une requête sur la table des occurrences (index date).
     films = film.objects.filter(
-        show__end_date__gte=now.date(),
-        show__start_date__lte=now.date()
-    ).distinct()
+        id__in=ShowOccurrence.objects.filter(date=timezone.localdate(now)).values('show__movie_id')
+    )
     
     tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-    return render(request, 'booking/index.html', {
+    response = render(request, 'booking/index.html', {
         'banners': banners,
         'films': films,
         'tomorrow': tomorrow
     })
+    response.listing_expires_at = next_midnight()
+    return response
 
 # pour afficher les détails d'un film spécifique
+@cache_listing_page
 def movie_detail(request, movie_id):
     film_obj = get_object_or_404(film, id=movie_id)
     now = timezone.now()
     
-    showtimes = show.objects.filter(
-        movie=film_obj,
-        end_date__gte=now.date(),
-        start_date__lte=now.date()
-    ).select_related('salle')
-
-    # filtrer les séances encore valides aujourd'hui
-    filtered_showtimes = []
-    tz = timezone.get_current_timezone()
-
-    # Parcourt les séances pour filtrer celles qui ne sont pas encore terminées :
-    for s in showtimes:
-        show_datetime = datetime.combine(now.date(), s.showtime, tzinfo=tz)
-        end_datetime = show_datetime + timedelta(minutes=film_obj.duration)
-        if now.date() < s.start_date or (now.date() == s.start_date and now < end_datetime):
-            filtered_showtimes.append(s)
+    # Séances d'aujourd'hui qui ne sont pas encore terminées, directement depuis les occurrences.
+    occurrences = ShowOccurrence.objects.filter(
+        show__movie=film_obj,
+        date=timezone.localdate(now),
+        end_datetime__gt=now
+    ).select_related('show__salle').order_by('start_datetime')
+    occurrences = list(occurrences)
+    filtered_showtimes = [o.show for o in occurrences]
 
     tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-    return render(request, 'booking/movie_detail.html', {
+    response = render(request, 'booking/movie_detail.html', {
         'film': film_obj,
         'showtimes': filtered_showtimes,
         'tomorrow': tomorrow
     })
+    # La page change dès que la première séance listée se termine.
+    response.listing_expires_at = min([o.end_datetime for o in occurrences] + [next_midnight()])
+    return response
+
+# pour rechercher un film par titre, résumé, genre ou langue (?q=), les plus pertinents d'abord.
+@cache_listing_page
+def search(request):
+    query = request.GET.get('q', '').strip()[:100]
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    return render(request, 'booking/search.html', {
+        'query': query,
+        'films': search_films(query) if query else [],
+        'tomorrow': tomorrow
+    })
+
+# pour l'autocomplétion du champ de recherche : titres dont les mots commencent par les lettres tapées.
+def search_suggest(request):
+    query = request.GET.get('q', '').strip()[:100]
+    key = listing_key('suggest', query.lower())
+    results = cache.get(key)
+    if results is None:
+        with use_primary():
+            results = [
+                {'id': film_id, 'name': name, 'url': reverse('movie_detail', args=[film_id])}
+                for film_id, name in suggest_films(query)
+            ]
+        cache.set(key, results, listing_timeout())
+    return JsonResponse({'results': results})
 
 # pour permettre à l'utilisateur de choisir une séance pour une date donnée.
 def show_selection(request):
@@ -79,28 +121,29 @@ def show_selection(request):
 
     now = timezone.now()
     
-    films = film.objects.prefetch_related('show_set__salle').filter(
-        show__start_date__lte=selected_date, 
-        show__end_date__gte=selected_date
-    ).distinct()
-    
-    films_dict = {}
-    tz = timezone.get_current_timezone()
+    # La liste des séances est mise en cache par date et version du catalogue, jusqu'à la fin de la première séance.
+    key = listing_key('show_selection', selected_date)
+    cached = cache.get(key)
+    if cached is not None:
+        films_dict, expires_at = cached
+    else:
+        # Une seule requête indexée : les projections du jour qui ne sont pas terminées, film et salle joints.
+        # Lue sur la base principale, comme tout ce qui remplit une clé versionnée (voir listing_cache).
+        with use_primary():
+            occurrences = list(ShowOccurrence.objects.filter(
+                date=selected_date,
+                end_datetime__gt=now
+            ).select_related('show__movie', 'show__salle').order_by('show__movie_id', 'start_datetime'))
 
-    # Parcourt les films et leurs séances pour créer un dictionnaire
-    for f in films:
-        showtimes = {}
-        for s in f.show_set.filter(
-            start_date__lte=selected_date, 
-            end_date__gte=selected_date
-        ):
-            # vérifie que la séance n'est pas terminée
-            show_datetime = datetime.combine(selected_date, s.showtime, tzinfo=tz)
-            end_datetime = show_datetime + timedelta(minutes=f.duration)
-            if selected_date > now.date() or (selected_date == now.date() and now < end_datetime):
-                showtimes[s.id] = {'showtime': s.showtime, 'salle': s.salle.name}
-        if showtimes:
-            films_dict[f.movie_name] = {'url': f.url, 'showtimes': showtimes}
+        films_dict = {}
+        expires_at = next_midnight()
+        # Construit un dictionnaire film -> séances
+        for o in occurrences:
+            s = o.show
+            entry = films_dict.setdefault(s.movie.movie_name, {'url': s.movie.url, 'showtimes': {}})
+            entry['showtimes'][s.id] = {'showtime': s.showtime, 'salle': s.salle.name}
+            expires_at = min(expires_at, o.end_datetime)
+        cache.set(key, (films_dict, expires_at), listing_timeout(expires_at))
     
     tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
     # Calcule la date de demain et celle dans 30 jours pour limiter les choix de dates.
@@ -109,84 +152,51 @@ def show_selection(request):
         'films': films_dict, 
         'date': date, 
         'tomorrow': tomorrow, 
-        'thirty_days_later': thirty_days_later
+        'thirty_days_later': thirty_days_later,
+        'catalogue_version': catalogue_version(),
+        'listing_timeout': listing_timeout(expires_at),
     })
 
+MY_BOOKINGS_PAGE_SIZE = 20
+
+# Une page de réservations ; un curseur invalide (modifié, périmé) renvoie la première page de cette liste seulement.
+def _bookings_page(queryset, ordering, cursor):
+    try:
+        rows, next_cursor = keyset_page(queryset, ordering, cursor, MY_BOOKINGS_PAGE_SIZE)
+    except ValueError:
+        cursor = None
+        rows, next_cursor = keyset_page(queryset, ordering, None, MY_BOOKINGS_PAGE_SIZE)
+    return rows, next_cursor, cursor
+
 @login_required
 def my_bookings(request):
-    bookings = Booking.objects.filter(user=request.user).order_by('-show_date').select_related('show__movie', 'show__salle')
     tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
     today = datetime.now().date()
-    return render(request, 'booking/bookings.html', {'data': bookings, 'today': today, 'tomorrow': tomorrow})
-
-def generate_booking_pdf(booking, film, salle, show, sdate, seats, total):
-    # Crée un buffer en mémoire pour stocker le PDF
-    buffer = BytesIO()
-    # Initialise un document PDF avec la taille letter
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        name='Title',
-        fontSize=18,
-        spaceAfter=20,
-        alignment=1,
-        textColor=colors.darkblue,
-        fontName='Helvetica-Bold'
+    # Le statut (Cancel / Watched) est calculé en SQL ; séances à venir et passées sont deux requêtes
+    # paginées par curseur sur l'index (user, show_date, id).
+    bookings = Booking.objects.filter(user=request.user).select_related('show__movie', 'show__salle').annotate(
+        status=Case(When(show_date__gte=today, then=Value('Cancel')), default=Value('Watched'))
     )
-    normal_style = ParagraphStyle(
-        name='Normal',
-        fontSize=12,
-        spaceAfter=10,
-        fontName='Helvetica'
+    upcoming, next_upcoming, upcoming_cursor = _bookings_page(
+        bookings.filter(show_date__gte=today), [('show_date', False), ('id', False)], request.GET.get('upcoming')
     )
-
-    # Title
-    elements.append(Paragraph("Morro_Cine Booking Receipt", title_style))
-    elements.append(Spacer(1, 12))
-    
-    # Booking details
-    data = [
-        ["Movie:", film.movie_name],
-        ["Hall:", salle.name],
-        ["Date:", sdate],
-        ["Showtime:", show.showtime.strftime('%I:%M %p')],
-        ["Seats:", seats],
-        ["Total:", f"${total:.2f}"],
-        ["User:", booking.user.username],
-        ["Booking ID:", str(booking.id)],
-        ["Booking Date:", booking.show_date.strftime('%Y-%m-%d')],
-    ]
-    
-    table = Table(data, colWidths=[100, 300])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-    ]))
-    elements.append(table)
-    
-    # Footer
-    elements.append(Spacer(1, 20))
-    elements.append(Paragraph("Thank you for booking with Morro_Cine!", normal_style))
-    elements.append(Paragraph("Contact us at support@Morro_Cine.com", normal_style))
-
-    #Génère le PDF à partir des éléments.
-    doc.build(elements)
-    #Récupère le contenu du buffer.
-    pdf = buffer.getvalue()
-    #Ferme le buffer et retourne le PDF.
-    buffer.close()
-    return pdf
+    past, next_past, past_cursor = _bookings_page(
+        bookings.filter(show_date__lt=today), [('show_date', True), ('id', True)], request.GET.get('past')
+    )
+    return render(request, 'booking/bookings.html', {
+        'upcoming': upcoming,
+        'past': past,
+        'upcoming_cursor': upcoming_cursor or '',
+        'past_cursor': past_cursor or '',
+        'next_upcoming': next_upcoming,
+        'next_past': next_past,
+        'today': today,
+        'tomorrow': tomorrow,
+    })
 
 @login_required
+@rate_limit('checkout', template='booking/error.html')
+@use_primary()
 def checkout(request):
     tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
     if request.method == 'POST':
@@ -194,7 +204,16 @@ def checkout(request):
         show_date = request.POST.get('showdate')
         seats = request.POST.get('seats')
         if show_id and show_date and seats:
+            # Séance et date vérifiées avant toute lecture (ORM, clés des sièges retenus, qui normalisent la date).
+            if _show_params(show_id, show_date) is None:
+                return render(request, 'booking/error.html', {
+                    'error': "Invalid show or date.",
+                    'tomorrow': tomorrow
+                })
             show_obj = get_object_or_404(show, id=show_id)
+            # Pendant une ouverture de ventes, seuls les acheteurs admis par la salle d'attente paient.
+            if not admitted(request, show_obj.id):
+                return redirect(f"{reverse('waiting_room', args=[show_obj.id])}?date={show_date}")
             seat_list = seats.split(',')
             seat_pattern = re.compile(r'^[A-Z][1-9][0-9]*$')
             for seat in seat_list:
@@ -203,20 +222,36 @@ def checkout(request):
                         'error': f"Seat '{seat}' is not in a valid format (e.g., A1, B12).",
                         'tomorrow': tomorrow
                     })
+            # Refuse les sièges retenus par un autre client pendant son paiement.
+            requested = seats_to_mask(seat for seat in parse_seats(seats) if is_seat_label(seat))
+            held_by_others = held_seats(show_obj.id, show_date, exclude_owner=request.user.pk) & requested
+            if held_by_others:
+                return render(request, 'booking/error.html', {
+                    'error': f"Seat(s) {', '.join(mask_to_seats(held_by_others))} are being held by another customer.",
+                    'tomorrow': tomorrow
+                })
+            # Transaction atomique, sièges revérifiés sous contrôle de version, relances si la base est verrouillée.
             try:
-                booking = Booking.objects.create(
-                    user=request.user,
-                    show=show_obj,
-                    show_date=show_date,
-                    seat_num=seats
-                )
+                booking = place_booking(request.user, show_obj, show_date, seats)
             except ValidationError as e:
                 return render(request, 'booking/error.html', {
                     'error': str(e),
                     'tomorrow': tomorrow
                 })
-            # Calcule le coût total (nombre de sièges × prix de la séance).
-            total = len(seat_list) * show_obj.price
+            except OperationalError:
+                return render(request, 'booking/error.html', {
+                    'error': "Too many bookings are being made right now, please try again in a moment.",
+                    'tomorrow': tomorrow
+                }, status=503)
+            # La réservation temporaire devient une réservation : on libère les clés de cache.
+            release_holds(show_obj.id, show_date, request.user.pk, sold_mask=requested)
+            # Achat terminé : la place dans la salle d'attente passe au suivant.
+            if room_capacity(show_obj.id) is not None:
+                leave(show_obj.id, request_ticket(request, show_obj.id))
+            # Prépare le reçu PDF en arrière-plan : le premier téléchargement sera servi depuis le disque.
+            warm_receipt(booking)
+            # Calcule le coût total (nombre de sièges × prix payé).
+            total = len(seat_list) * booking.seat_price
             context = {
                 'film': show_obj.movie,
                 'salle': show_obj.salle,
@@ -230,47 +265,287 @@ def checkout(request):
             return render(request, 'booking/checkout.html', context)
     elif request.GET.get('download_pdf') == 'true':
         booking_id = request.GET.get('booking_id')
-        booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-        show_obj = booking.show
-        film = show_obj.movie
-        salle = show_obj.salle
-        sdate = booking.show_date.strftime('%Y-%m-%d')
-        seats = booking.seat_num
-        total = len(seats.split(',')) * show_obj.price
-        
-        # Génère le PDF de réservation.
-        pdf = generate_booking_pdf(booking, film, salle, show_obj, sdate, seats, total)
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="booking_{booking.id}_receipt.pdf"'
-        response.write(pdf)
-        return response
+        booking = get_object_or_404(
+            Booking.objects.select_related('show__movie', 'show__salle', 'user'), id=booking_id, user=request.user
+        )
+        # Reçu rendu dans le pool de processus et mis en cache sur disque, servi sans copie (sendfile).
+        path = get_receipt(booking)
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=f"booking_{booking.id}_receipt.pdf",
+            content_type='application/pdf',
+        )
     return redirect('index')
 
 # pour annuler une réservation.
 @login_required
+@use_primary()
 def cancel_booking(request, booking_id):
     booking = get_object_or_404(Booking, id=booking_id, user=request.user)
     if booking.show_date >= datetime.now().date():
         booking.delete()
     return redirect('my_bookings')
 
+# salle d'attente d'une séance très demandée : chaque visiteur reçoit un numéro (cookie signé)
+# et la page interroge waiting_room_status jusqu'à son admission, puis renvoie au choix des sièges.
+def waiting_room(request, show_id):
+    show_obj = get_object_or_404(show.objects.select_related('movie'), id=show_id)
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    next_url = f"{reverse('show_selection')}?date={request.GET.get('date') or tomorrow}"
+    if room_capacity(show_obj.id) is None:
+        return redirect(next_url)
+    ticket = request_ticket(request, show_obj.id)
+    is_in, position = poll(show_obj.id, ticket) if ticket else (False, None)
+    if position is None and not is_in:
+        # Pas encore de numéro, ou numéro périmé : on reprend en fin de file.
+        ticket = join(show_obj.id)
+        is_in, position = poll(show_obj.id, ticket)
+    token = make_token(show_obj.id, ticket)
+    if is_in:
+        response = redirect(next_url)
+    else:
+        response = render(request, 'booking/waiting_room.html', {
+            'film': show_obj.movie,
+            'show': show_obj,
+            'position': position,
+            'token': token,
+            'poll_interval': poll_interval(),
+            'next_url': next_url,
+            'tomorrow': tomorrow,
+        })
+    response.set_cookie(cookie_name(show_obj.id), token, httponly=True, samesite='Lax')
+    return response
+
+# pour connaître sa place dans la file (?token=), en JSON ; garde aussi le numéro en vie.
+def waiting_room_status(request, show_id):
+    ticket = read_token(request.GET.get('token'), show_id) or request_ticket(request, show_id)
+    if ticket is None:
+        return JsonResponse({'error': 'Invalid token'}, status=400)
+    is_in, position = poll(int(show_id), ticket)
+    return JsonResponse({
+        'admitted': is_in,
+        'position': position,
+        'expired': not is_in and position is None,
+        'retry_after': poll_interval(),
+    })
+
+# pour servir une affiche ou une bannière redimensionnée, en WebP si le navigateur l'accepte, sinon en JPEG.
+# Une vignette ne change jamais pour une URL donnée (nouvelle URL = nouvelle empreinte) : cache d'un an.
+# Si l'image distante est inaccessible, on redirige vers elle pour que la page reste complète.
+@use_primary()
+def image_thumb(request, url_hash, width):
+    if width not in thumbnail_widths():
+        raise Http404("Unknown thumbnail width")
+    fmt = 'webp' if 'image/webp' in request.META.get('HTTP_ACCEPT', '') else 'jpeg'
+    try:
+        path = thumbnail_path(url_hash, width, fmt)
+    except ThumbnailError as exc:
+        response = HttpResponseRedirect(exc.url)
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+    if path is None:
+        raise Http404("Unknown image")
+    response = FileResponse(open(path, 'rb'), content_type=FORMATS[fmt][1])
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response['Vary'] = 'Accept'
+    return response
+
+# Identifiant de séance et date reçus dans la requête, ou None si l'un manque ou est invalide :
+# vérifiés une fois ici plutôt que dans chaque lecture (ORM, clés de cache des sièges retenus).
+def _show_params(show_id, show_date):
+    try:
+        show_id = int(show_id)
+        show_date = parse_date(show_date or '')
+    except (TypeError, ValueError):
+        return None
+    return (show_id, show_date) if show_date else None
+
 # pour récupérer les sièges réservés pour une séance spécifique.
-def booked_seats(request):
-    show_id = request.GET.get('show_id')
-    show_date = request.GET.get('show_date')
-    bookings = Booking.objects.filter(show_id=show_id, show_date=show_date)
-    # Combine tous les numéros de sièges réservés en une seule chaîne séparée par des virgules.
-    seats = ','.join([b.seat_num for b in bookings])
-    return HttpResponse(seats)
+# Vues asynchrones (ORM async) : sous ASGI elles n'occupent pas de thread pendant les lectures.
+# L'ETag combine le jeton de version du plan et les sièges retenus par les autres (lus dans le cache) :
+# un rafraîchissement sans changement reçoit un 304 sans aucune lecture en base.
+@rate_limit('seatmap')
+async def booked_seats(request):
+    params = _show_params(request.GET.get('show_id'), request.GET.get('show_date'))
+    if params is None:
+        return HttpResponse('Invalid show or date', status=400)
+    show_id, show_date = params
+    user = await request.auser()
+    owner = user.pk if user.is_authenticated else None
+    held = await aheld_seats(show_id, show_date, exclude_owner=owner)
+    etag = make_etag(await aseatmap_version(show_id, show_date), held)
+    response = not_modified(request, etag)
+    if response is None:
+        # Lit le bitmap de l'inventaire (une seule ligne) et le convertit en chaîne séparée par des virgules.
+        # Les sièges retenus par d'autres clients apparaissent aussi comme indisponibles.
+        # Lu sur la base principale : le jeton change au commit, une réplica en retard servirait
+        # l'ancien plan sous le nouvel ETag, gardé ensuite par le navigateur.
+        with use_primary():
+            mask = await SeatInventory.abooked_mask(show_id, show_date) | held
+        response = HttpResponse(','.join(mask_to_seats(mask)))
+        response['ETag'] = etag
+    # Le navigateur garde la réponse mais la revalide à chaque fois (If-None-Match).
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+# pour retenir temporairement les sièges sélectionnés (SEAT_HOLD_TTL secondes).
+@login_required
+@rate_limit('seatmap')
+def hold_seats(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    params = _show_params(request.POST.get('showid'), request.POST.get('showdate'))
+    if params is None:
+        return JsonResponse({'error': 'Invalid show or date'}, status=400)
+    show_id, show_date = params
+    show_obj = get_object_or_404(show, id=show_id)
+    if not admitted(request, show_obj.id):
+        return JsonResponse({
+            'error': 'waiting_room',
+            'waiting_room': f"{reverse('waiting_room', args=[show_obj.id])}?date={show_date}",
+        }, status=403)
+    seats = [seat for seat in parse_seats(request.POST.get('seats')) if is_seat_label(seat)]
+    sold = SeatInventory.booked_mask(show_obj.id, show_date)
+    held, unavailable = take_seat_hold(show_obj.id, show_date, seats, request.user.pk, unavailable_mask=sold)
+    return JsonResponse({
+        'held': held,
+        'unavailable': unavailable,
+        'expires_in': hold_ttl(),
+    }, status=409 if unavailable else 200)
 
 # pour retourner les détails d'une séance en JSON.
-def show_details(request):
+# La salle d'une séance ne change qu'avec le catalogue : l'ETag vient de sa version, sans lire la base.
+async def show_details(request):
     show_id = request.GET.get('show_id')
+    etag = make_etag('show', await acatalogue_version(), show_id)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
     try:
-        show_obj = show.objects.select_related('salle').get(id=show_id)
-        return JsonResponse({
-            'capacity': show_obj.salle.capacity,
-            'salle_name': show_obj.salle.name,
-        })
+        # Sur la base principale : une réplica en retard donnerait l'ancienne salle sous le nouvel ETag.
+        with use_primary():
+            show_obj = await show.objects.select_related('salle').aget(id=show_id)
+    except (show.DoesNotExist, ValueError):
+        return JsonResponse({'error': 'Show not found'}, status=404)
+    response = JsonResponse({
+        'capacity': show_obj.salle.capacity,
+        'salle_name': show_obj.salle.name,
+    })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+# pour retourner en une requête la salle, la capacité et les sièges indisponibles d'une séance.
+@rate_limit('seatmap')
+async def availability(request):
+    params = _show_params(request.GET.get('show_id'), request.GET.get('show_date'))
+    if params is None:
+        return JsonResponse({'error': 'Invalid show or date'}, status=400)
+    show_id, show_date = params
+    try:
+        show_obj = await show.objects.select_related('salle').aget(id=show_id)
+    except show.DoesNotExist:
+        return JsonResponse({'error': 'Show not found'}, status=404)
+    mask = await SeatInventory.abooked_mask(show_obj.id, show_date)
+    user = await request.auser()
+    owner = user.pk if user.is_authenticated else None
+    mask |= await aheld_seats(show_obj.id, show_date, exclude_owner=owner)
+    return JsonResponse({
+        'capacity': show_obj.salle.capacity,
+        'salle_name': show_obj.salle.name,
+        'booked': mask_to_seats(mask),
+    })
+
+# pour proposer les meilleurs sièges libres à un groupe (?show_id=&show_date=&count=).
+# Les sièges vendus et ceux retenus par d'autres clients sont exclus ; rien n'est réservé ici.
+@rate_limit('seatmap')
+async def best_seats(request):
+    params = _show_params(request.GET.get('show_id'), request.GET.get('show_date'))
+    count = request.GET.get('count', '')
+    if params is None:
+        return JsonResponse({'error': 'Invalid show or date'}, status=400)
+    if not count.isdigit() or int(count) < 1:
+        return JsonResponse({'error': 'count must be a positive integer'}, status=400)
+    show_id, show_date = params
+    try:
+        show_obj = await show.objects.select_related('salle').aget(id=show_id)
     except show.DoesNotExist:
-        return JsonResponse({'error': 'Show not found'}, status=404)
\ No newline at end of file
+        return JsonResponse({'error': 'Show not found'}, status=404)
+    mask = await SeatInventory.abooked_mask(show_obj.id, show_date)
+    user = await request.auser()
+    owner = user.pk if user.is_authenticated else None
+    mask |= await aheld_seats(show_obj.id, show_date, exclude_owner=owner)
+    seats, contiguous = pick_best_seats(mask, show_obj.salle.capacity, int(count))
+    if not seats:
+        return JsonResponse({'error': 'Not enough seats available', 'seats': [], 'contiguous': False}, status=409)
+    return JsonResponse({'seats': seats, 'contiguous': contiguous})
+
+# pour retourner la disponibilité de toutes les séances d'une journée (optionnellement d'un film).
+# Deux requêtes quel que soit le nombre de séances : les séances (film et salle joints) puis leurs inventaires.
+# 'seats' est le bitmap des sièges vendus en hexadécimal (bit i = i-ème siège, A1 = bit 0).
+async def day_availability(request):
+    date_str = request.GET.get('date', '')
+    try:
+        selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'date must use the YYYY-MM-DD format'}, status=400)
+    shows = show.objects.filter(start_date__lte=selected_date, end_date__gte=selected_date)
+    film_id = request.GET.get('film')
+    if film_id:
+        if not film_id.isdigit():
+            return JsonResponse({'error': 'film must be an id'}, status=400)
+        shows = shows.filter(movie_id=film_id)
+    shows = [s async for s in shows.select_related('movie', 'salle').order_by('showtime')]
+    masks = {
+        show_id: bytes_to_mask(bitmap)
+        async for show_id, bitmap in SeatInventory.objects.filter(
+            show_id__in=[s.id for s in shows], show_date=selected_date
+        ).values_list('show_id', 'bitmap')
+    }
+    data = []
+    for s in shows:
+        mask = masks.get(s.id, 0)
+        data.append({
+            'show_id': s.id,
+            'film': s.movie.movie_name,
+            'showtime': s.showtime.strftime('%H:%M'),
+            'salle_name': s.salle.name,
+            'capacity': s.salle.capacity,
+            'sold': mask.bit_count(),
+            'seats': format(mask, 'x'),
+        })
+    return JsonResponse({'date': date_str, 'shows': data})
+
+# pour diffuser en direct (Server-Sent Events) les changements de sièges d'une séance.
+# Nécessite le serveur ASGI : sous WSGI, la réponse 204 indique au navigateur de ne pas se reconnecter.
+SEAT_EVENTS_KEEPALIVE = 15
+
+async def seat_events(request):
+    show_id = request.GET.get('show_id')
+    show_date = request.GET.get('show_date')
+    if not show_id or not show_date:
+        return JsonResponse({'error': 'show_id and show_date are required'}, status=400)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    channel = channel_name(show_id, show_date)
+
+    async def stream():
+        subscriber = broker.subscribe(channel)
+        queue = subscriber[1]
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SEAT_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(channel, subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
\ No newline at end of file
@@ -3,6 +3,9 @@ ASGI config for movieticket_new project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn movieticket_new.asgi:application``)
+to enable the live seat-map stream at /seatevents/.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,113 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Lectures du catalogue et de la disponibilité envoyées aux réplicas, tout le reste sur la base principale.
+# _read_replicas n'est activé que par le middleware, pour les requêtes GET qui n'ont rien écrit récemment :
+# commandes, shell et tâches de fond restent sur la base principale. _wrote note que la requête a écrit.
+_read_replicas = ContextVar('db_read_replicas', default=False)
+_wrote = ContextVar('db_wrote', default=None)
+
+STICKY_COOKIE = 'db_primary'
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def _replica_model(model):
+    meta = model._meta
+    allowed = getattr(settings, 'REPLICA_READ_MODELS', ())
+    return meta.app_label in allowed or meta.label_lower in allowed
+
+
+@contextmanager
+def use_primary():
+    """Send every query of the block (or of the decorated sync view) to the primary database."""
+    token = _read_replicas.set(False)
+    try:
+        yield
+    finally:
+        _read_replicas.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or not _read_replicas.get() or not _replica_model(model):
+            return DEFAULT_DB_ALIAS
+        # Dans une transaction ouverte sur la base principale (réservation, import), on lit ce qu'on écrit.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote[0] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les réplicas sont des copies de la base principale : les relations entre elles sont valides.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas sont recopiées depuis la base principale (sync_replicas), jamais migrées.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests (GET, HEAD, OPTIONS) read the catalogue from the replicas, except for
+    REPLICA_STICKY_SECONDS after a request that wrote (short-lived cookie), so users read their
+    own writes. Not loaded when no replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def pin(self, request):
+        sticky = request.COOKIES.get(STICKY_COOKIE, '')
+        recent = sticky.isdigit() and int(sticky) > time.time()
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        return _read_replicas.set(safe and not recent), _wrote.set([False])
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        replicas, wrote = self.pin(request)
+        try:
+            response = self.get_response(request)
+            return self.finish(response, _wrote.get()[0])
+        finally:
+            _read_replicas.reset(replicas)
+            _wrote.reset(wrote)
+
+    async def __acall__(self, request):
+        replicas, wrote = self.pin(request)
+        try:
+            response = await self.get_response(request)
+            return self.finish(response, _wrote.get()[0])
+        finally:
+            _read_replicas.reset(replicas)
+            _wrote.reset(wrote)
+
+    def finish(self, response, wrote):
+        if wrote:
+            until = int(time.time()) + self.sticky_seconds
+            response.set_cookie(STICKY_COOKIE, str(until), max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,146 @@
+import mimetypes
+import time
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from .timing import start_timing, stop_timing, record_slow_request
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header (db, tpl, view, total in ms) to every response and keeps the
+    slowest requests of this process, with their SQL fingerprints, for the staff page.
+    Template time needs the movieticket_new.timing.TimedDjangoTemplates backend.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, 'SLOW_REQUEST_MS', 500) / 1000
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing, token = start_timing()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_timing(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing, token = start_timing()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timing(token)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing):
+        total = time.perf_counter() - timing.started
+        template = timing.template - timing.template_db
+        # Temps Python de la vue et des middlewares : tout ce qui n'est ni SQL ni rendu de gabarit.
+        view = max(total - timing.db - template, 0)
+        response['Server-Timing'] = (
+            f'db;dur={timing.db * 1000:.1f};desc="{timing.queries} queries", '
+            f'tpl;dur={template * 1000:.1f}, view;dur={view * 1000:.1f}, total;dur={total * 1000:.1f}'
+        )
+        if total >= self.slow_threshold:
+            record_slow_request(request, response, timing, total)
+        return response
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0) from an Accept-Encoding header."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if coding and not (q.startswith('q=') and q[2:].strip() in ('0', '0.0', '0.00', '0.000')):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serves collected static files from STATIC_ROOT, with the precompressed .br/.gz variant the client
+    accepts. Content-hashed names (from the staticfiles manifest) are cached for a year as immutable;
+    other files for STATIC_MAX_AGE seconds with Last-Modified revalidation.
+    """
+    sync_capable = True
+    async_capable = True
+    # Variantes écrites par CompressedManifestStaticFilesStorage, par ordre de préférence.
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT or not settings.STATIC_URL.startswith('/'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = Path(settings.STATIC_ROOT)
+        self.max_age = getattr(settings, 'STATIC_MAX_AGE', 3600)
+        self.hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        name = request.path[len(self.prefix):]
+        try:
+            path = Path(safe_join(self.root, name))
+        except SuspiciousFileOperation:
+            return None
+        if not path.is_file():
+            return None
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        served, encoding, has_variants = path, None, False
+        for coding, suffix in self.encodings:
+            variant = path.with_name(path.name + suffix)
+            if variant.is_file():
+                has_variants = True
+                if encoding is None and coding in accepted:
+                    served, encoding = variant, coding
+        stat = served.stat()
+
+        if name in self.hashed:
+            # Le nom change avec le contenu : le navigateur n'a jamais besoin de revalider.
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            cache_control = f'public, max-age={self.max_age}'
+            if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+                response = HttpResponseNotModified()
+                response['Cache-Control'] = cache_control
+                return response
+
+        content_type, _ = mimetypes.guess_type(name)
+        response = HttpResponse(
+            served.read_bytes() if request.method == 'GET' else b'',
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Content-Length'] = stat.st_size
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = cache_control
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if has_variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,7 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'movieticket_new.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'movieticket_new.middleware.StaticFilesMiddleware',
+    'movieticket_new.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,10 +60,18 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'movieticket_new.urls'
 AUTH_USER_MODEL = 'accounts.Account'
+# The logged-in Account is served from cache (see accounts/backends.py), sessions too (cached_db).
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Most recently used accounts kept in each process, on top of the shared cache.
+ACCOUNT_LOCAL_CACHE_SIZE = 1000
+# last_login is written at most once per this many seconds per account.
+LAST_LOGIN_UPDATE_INTERVAL = 3600
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, instrumenté pour l'en-tête Server-Timing.
+        'BACKEND': 'movieticket_new.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,8 +94,92 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Concurrence : WAL (les lectures ne bloquent pas l'écriture), attente du verrou jusqu'à 20 s,
+        # et transactions IMMEDIATE qui prennent le verrou d'écriture dès BEGIN (pas d'échec à la promotion).
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+        },
+    }
+}
+
+# Checkout retries when SQLite still reports "database is locked" (exponential backoff, seconds).
+CHECKOUT_RETRIES = 5
+CHECKOUT_RETRY_BACKOFF = 0.05
+
+# Read replicas: comma-separated SQLite files in the DATABASE_REPLICAS environment variable
+# (e.g. "replica1.sqlite3,replica2.sqlite3"), opened read-only and refreshed from the primary
+# with `manage.py sync_replicas`. Run it once before starting the server.
+DATABASE_REPLICAS = [BASE_DIR / name.strip() for name in os.environ.get('DATABASE_REPLICAS', '').split(',') if name.strip()]
+for number, replica in enumerate(DATABASE_REPLICAS, 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{replica}?mode=ro',
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['movieticket_new.db_router.PrimaryReplicaRouter']
+# Models read from the replicas (app labels or app.model); everything else stays on the primary.
+REPLICA_READ_MODELS = ['staff', 'booking.seatinventory']
+# After a request that wrote, the client reads from the primary for this many seconds.
+REPLICA_STICKY_SECONDS = 15
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem suffices for a single process; use a shared backend (file, Redis, Memcached) with several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'movieticket',
+    }
+}
+
+# Upper bound, in seconds, for cached public listings (index, movie detail, show selection).
+# Entries are also keyed by catalogue version, so staff edits take effect immediately.
+LISTING_CACHE_TIMEOUT = 600
+
+# Seconds a seat stays held for a customer between selection and checkout.
+SEAT_HOLD_TTL = 300
+
+
+# Admission control for on-sale spikes (booking/admission.py).
+# Rate-limit counters and waiting rooms live in the default cache. The LocMemCache above is
+# separate in every process: with several workers each one counts and queues on its own, and
+# `manage.py waiting_room` refuses to run because the server would never see its changes.
+# Use a shared backend (Redis, Memcached or the database cache) in production.
+# Per user (or IP when anonymous): at most N requests per T seconds for each scope.
+RATE_LIMITS = {
+    'checkout': (10, 60),
+    'seatmap': (120, 60),
 }
+# Waiting rooms are opened per show from the staff "Waiting rooms" page, or with
+# `manage.py waiting_room open <show_id> --capacity N` when the cache is shared.
+# A ticket lapses when its page stops polling for WAITING_ROOM_ALIVE_TTL seconds; an admitted
+# buyer keeps their place for WAITING_ROOM_SESSION_TTL seconds or until they check out.
+WAITING_ROOM_ALIVE_TTL = 30
+WAITING_ROOM_POLL_INTERVAL = 5
+WAITING_ROOM_SESSION_TTL = 600
+
+
+# Booking receipts: PDFs are rendered by a process pool and cached on disk.
+RECEIPT_CACHE_DIR = BASE_DIR / 'receipts'
+RECEIPT_WORKERS = 2
+
+
+# Server-Timing: requests slower than SLOW_REQUEST_MS are kept (the last SLOW_REQUEST_LOG_SIZE
+# per process) with their SQL fingerprints, see /staff/slow-requests/.
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_LOG_SIZE = 50
+
+
+# Poster and banner thumbnails: remote images fetched once, resized on demand (see staff/thumbnails.py).
+THUMBNAIL_DIR = BASE_DIR / 'thumbnails'
+THUMBNAIL_WIDTHS = (80, 160, 320, 640, 1280)
+THUMBNAIL_FETCH_TIMEOUT = 10
+THUMBNAIL_MAX_BYTES = 10 * 1024 * 1024
 
 
 # Password validation
@@ -123,6 +219,18 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# collectstatic writes content-hashed copies plus .gz (and .br with the brotli package) variants;
+# StaticFilesMiddleware serves them, hashed names as immutable for a year.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'movieticket_new.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Cache lifetime (seconds) for static files served under their original, unhashed name.
+STATIC_MAX_AGE = 3600
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -0,0 +1,51 @@
+import gzip
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli est facultatif : sans lui, seules les variantes .gz sont produites.
+    brotli = None
+
+# Types de fichiers qui gagnent à être compressés (les images et polices le sont déjà).
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico')
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage (content-hashed names) that also writes .gz and, when the brotli
+    package is installed, .br next to each compressible file during collectstatic.
+    StaticFilesMiddleware serves them.
+    """
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Fichier introuvable (ex. images/favicon.ico) : on garde le nom d'origine au lieu de faire échouer la page.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Les noms d'origine et les noms finaux avec empreinte (pas ceux des passes intermédiaires).
+        for name in sorted(set(paths) | set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                for compressed in self.compress(name):
+                    yield name, compressed, True
+
+    def compress(self, name):
+        with self.open(name) as handle:
+            content = handle.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, data in variants:
+            # Une variante plus grosse que l'original ne sert à rien.
+            if len(data) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                yield self._save(name + suffix, ContentFile(data))
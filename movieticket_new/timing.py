@@ -0,0 +1,149 @@
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils import timezone
+
+# Mesures par requête (requêtes SQL, temps base de données, rendu des gabarits) pour ServerTimingMiddleware.
+# La mesure courante vit dans une ContextVar : elle suit la requête dans les threads de sync_to_async.
+_current = ContextVar('request_timing', default=None)
+
+# Au-delà, les requêtes SQL sont comptées et chronométrées mais leur texte n'est plus conservé.
+MAX_RECORDED_QUERIES = 500
+
+
+class RequestTiming:
+    __slots__ = ('started', 'queries', 'db', 'template', 'template_db', 'rendering', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_db = 0.0
+        self.rendering = False
+        self.statements = []
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db += duration
+        if self.rendering:
+            self.template_db += duration
+        if len(self.statements) < MAX_RECORDED_QUERIES:
+            self.statements.append((sql, duration))
+
+
+def start_timing():
+    # Connexions du thread ouvertes avant le chargement de ce module (connection_created déjà émis).
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(None, connection)
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def stop_timing(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Chaque thread a sa propre connexion : on l'instrumente à son ouverture.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder, dispatch_uid='movieticket_record_query')
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        # Les rendus imbriqués (render_to_string dans un gabarit) sont déjà comptés par le rendu englobant.
+        if timing is None or timing.rendering:
+            return super().render(context, request)
+        timing.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.rendering = False
+            timing.template += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render for ServerTimingMiddleware."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL with literals and placeholder lists folded, so repeated statements group together."""
+    sql = _PLACEHOLDER.sub('?', _NUMBER.sub('?', _STRING.sub('?', sql)))
+    return _SPACES.sub(' ', _IN_LIST.sub('(...)', sql)).strip()
+
+
+_slow_lock = threading.Lock()
+_slow_requests = deque(maxlen=getattr(settings, 'SLOW_REQUEST_LOG_SIZE', 50))
+
+
+def record_slow_request(request, response, timing, total):
+    # Empreintes calculées seulement pour les requêtes lentes : rien à payer sur les autres.
+    statements = {}
+    for sql, duration in timing.statements:
+        key = fingerprint(sql)
+        count, spent = statements.get(key, (0, 0.0))
+        statements[key] = (count + 1, spent + duration)
+    top = sorted(statements.items(), key=lambda item: item[1][1], reverse=True)[:10]
+    entry = {
+        'at': timezone.now(),
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'total_ms': total * 1000,
+        'db_ms': timing.db * 1000,
+        'template_ms': (timing.template - timing.template_db) * 1000,
+        'queries': timing.queries,
+        'repeated': sum(count for count, _ in statements.values() if count > 1),
+        'statements': [
+            {'sql': sql, 'count': count, 'ms': spent * 1000} for sql, (count, spent) in top
+        ],
+    }
+    with _slow_lock:
+        _slow_requests.append(entry)
+
+
+def slow_requests():
+    """Recent slow requests of this process, newest first."""
+    with _slow_lock:
+        return list(reversed(_slow_requests))
+
@@ -0,0 +1,34 @@
+import time
+from django.core.cache import cache
+
+# Numéro de version du catalogue (films, séances, bannières, salles), incrémenté à chaque modification.
+# Les caches des pages publiques l'incluent dans leurs clés : une modification les rend obsolètes immédiatement.
+VERSION_KEY = 'catalogue-version'
+
+
+def _initial_version():
+    # Basé sur l'horloge pour ne jamais réutiliser un numéro déjà vu si la clé a été évincée.
+    return int(time.time() * 1000)
+
+
+def catalogue_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acatalogue_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _initial_version(), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _initial_version(), None)
@@ -0,0 +1,69 @@
+import csv
+import json
+from datetime import datetime
+from django.db.models.functions import Coalesce
+
+# Export des réservations en flux : values_list + iterator() gardent une mémoire constante
+# quel que soit le nombre de lignes, et le premier octet part avant la fin de la requête.
+EXPORT_FIELDS = [
+    'booking_id', 'show_date', 'film', 'salle', 'showtime', 'price',
+    'seats', 'seat_count', 'total', 'username', 'email',
+]
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+
+def parse_export_filters(params):
+    """Read date_from/date_to (YYYY-MM-DD), film and salle (ids) from a dict-like; raises ValueError."""
+    filters = {}
+    for name in ('date_from', 'date_to'):
+        if params.get(name):
+            filters[name] = datetime.strptime(params[name], '%Y-%m-%d').date()
+    for name in ('film', 'salle'):
+        if params.get(name):
+            filters[name] = int(params[name])
+    return filters
+
+
+def export_rows(date_from=None, date_to=None, film=None, salle=None, chunk_size=2000):
+    from booking.models import Booking
+
+    bookings = Booking.objects.order_by('id')
+    if date_from:
+        bookings = bookings.filter(show_date__gte=date_from)
+    if date_to:
+        bookings = bookings.filter(show_date__lte=date_to)
+    if film:
+        bookings = bookings.filter(show__movie_id=film)
+    if salle:
+        bookings = bookings.filter(show__salle_id=salle)
+    # Prix payé à l'achat, comme les agrégats de ventes ; celui de la séance pour les anciennes réservations.
+    rows = bookings.annotate(unit_price=Coalesce('price', 'show__price')).values_list(
+        'id', 'show_date', 'show__movie__movie_name', 'show__salle__name', 'show__showtime',
+        'unit_price', 'seat_num', 'user__username', 'user__email',
+    ).iterator(chunk_size=chunk_size)
+    for booking_id, show_date, movie, salle_name, showtime, price, seats, username, email in rows:
+        seat_count = len(seats.split(','))
+        yield (booking_id, show_date.isoformat(), movie, salle_name, showtime.strftime('%H:%M'), price,
+               seats, seat_count, seat_count * price, username, email)
+
+
+class _Echo:
+    # Pseudo-fichier pour csv.writer : write() renvoie la ligne au lieu de l'écrire.
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def iter_export(fmt, rows):
+    return iter_ndjson(rows) if fmt == 'ndjson' else iter_csv(rows)
@@ -42,4 +42,6 @@ class SalleForm(forms.ModelForm):
         fields = ['name', 'capacity']
         widgets = {
             'capacity': forms.NumberInput(attrs={'min': 1}),
-        }
\ No newline at end of file
+        }
+class SeasonImportForm(forms.Form):
+    plan = forms.FileField(help_text="CSV or JSON with film, salle, showtime, price, start_date, end_date")
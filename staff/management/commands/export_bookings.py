@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from staff.exports import EXPORT_FORMATS, parse_export_filters, export_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream bookings (joined with show, film, salle and user) as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', help="File to write, defaults to stdout.")
+        parser.add_argument('--date-from', help="First show date (YYYY-MM-DD).")
+        parser.add_argument('--date-to', help="Last show date (YYYY-MM-DD).")
+        parser.add_argument('--film', help="Film id.")
+        parser.add_argument('--salle', help="Salle id.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_export_filters({
+                'date_from': options['date_from'], 'date_to': options['date_to'],
+                'film': options['film'], 'salle': options['salle'],
+            })
+        except ValueError as e:
+            raise CommandError(f"Invalid filter: {e}")
+        rows = export_rows(chunk_size=options['chunk_size'], **filters)
+        if not options['output']:
+            for chunk in iter_export(options['format'], rows):
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for chunk in iter_export(options['format'], rows):
+                out.write(chunk)
@@ -0,0 +1,36 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from staff.scheduling import read_season, plan_season, import_season
+
+
+class Command(BaseCommand):
+    help = "Import a season plan (CSV or JSON rows of film, salle, showtime, price, start_date, end_date)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json'], help="Defaults to the file extension.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, do not insert.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+        with open(path, 'rb') as stream:
+            try:
+                rows = read_season(stream, fmt)
+            except ValueError as e:
+                raise CommandError(f"Could not read {path}: {e}")
+
+        if options['dry_run']:
+            shows, errors = plan_season(rows)
+        else:
+            try:
+                shows, errors = import_season(rows), []
+            except ValidationError as e:
+                shows, errors = [], e.messages
+
+        if errors:
+            for error in errors:
+                self.stderr.write(error)
+            raise CommandError(f"{len(errors)} problem(s) found, nothing imported.")
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(shows)} shows."))
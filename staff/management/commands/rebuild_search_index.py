@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from staff.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text film search table (SQLite FTS5) from the film table. "
+        "Needed after bulk imports, which bypass the film signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(options['database'])
+        if not indexed:
+            self.stdout.write("Nothing indexed: no film, or FTS5 unavailable (searches use the icontains fallback).")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} film(s) for search."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from staff.models import show, ShowOccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-day show occurrence table from existing shows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Shows processed per batch.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        with transaction.atomic():
+            ShowOccurrence.objects.all().delete()
+            batch = []
+            for show_obj in show.objects.select_related('movie').order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(show_obj)
+                if len(batch) >= batch_size:
+                    ShowOccurrence.rebuild(batch)
+                    total += len(batch)
+                    batch = []
+            ShowOccurrence.rebuild(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt occurrences for {total} shows ({ShowOccurrence.objects.count()} rows)."
+        ))
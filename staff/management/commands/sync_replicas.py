@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database to the read replicas listed in DATABASE_REPLICAS, "
+        "using SQLite's online backup (consistent even while the site is writing)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Keep copying every INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("sync_replicas only copies SQLite databases; use the database's own replication.")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replica configured: set DATABASE_REPLICAS.")
+        while True:
+            started = time.perf_counter()
+            for replica in settings.DATABASE_REPLICAS:
+                self.copy(primary['NAME'], replica)
+            self.stdout.write(
+                f"Copied to {len(settings.DATABASE_REPLICAS)} replica(s) in {time.perf_counter() - started:.2f}s."
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source, target):
+        # Copie dans un fichier temporaire puis remplacement atomique : les lecteurs ouvrent soit
+        # l'ancienne copie, soit la nouvelle, jamais une copie en cours d'écriture.
+        tmp = f'{target}.{os.getpid()}.tmp'
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(tmp)
+        try:
+            src.backup(dst)
+            # La copie est ouverte en lecture seule : pas de WAL, qui exige des fichiers annexes inscriptibles.
+            dst.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            dst.close()
+            src.close()
+        os.replace(tmp, target)
@@ -0,0 +1,42 @@
+import shutil
+from django.core.management.base import BaseCommand
+from staff.models import RemoteImage, banner, film
+from staff.thumbnails import (
+    ThumbnailError, image_dir, register_image, source_path, thumbnail_path, thumbnail_widths, url_hash,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Register every film poster and banner image for the thumbnail proxy and forget the ones no longer used. "
+        "With --fetch, also download the originals and render every width ahead of the first visitor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fetch', action='store_true', help="Download and resize the images now.")
+
+    def handle(self, *args, **options):
+        urls = set(film.objects.exclude(url='').values_list('url', flat=True))
+        urls |= set(banner.objects.exclude(url='').values_list('url', flat=True))
+        for url in urls:
+            register_image(url)
+        used = {url_hash(url) for url in urls}
+        orphans = RemoteImage.objects.exclude(url_hash__in=used)
+        for digest in orphans.values_list('url_hash', flat=True):
+            shutil.rmtree(image_dir(digest), ignore_errors=True)
+        dropped, _ = orphans.delete()
+        self.stdout.write(f"{len(urls)} image(s) registered, {dropped} orphan(s) removed.")
+
+        if not options['fetch']:
+            return
+        failed = 0
+        for image in RemoteImage.objects.order_by('pk'):
+            try:
+                source_path(image)
+                for width in thumbnail_widths():
+                    for fmt in ('webp', 'jpeg'):
+                        thumbnail_path(image.url_hash, width, fmt)
+            except ThumbnailError as exc:
+                failed += 1
+                self.stderr.write(f"{image.url}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Thumbnails ready, {failed} image(s) could not be fetched."))
@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.core.validators import MinValueValidator
+from .scheduling import find_show_conflict, conflict_message
 
 class Salle(models.Model):
     name = models.CharField(max_length=50, unique=True)  # e.g., "Hall 1", "Hall 2"
@@ -26,6 +27,11 @@ class film(models.Model):
     def __str__(self):
         return self.movie_name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['movie_name', 'id']),
+        ]
+
 class show(models.Model):
     movie = models.ForeignKey(film, on_delete=models.CASCADE)
     salle = models.ForeignKey(Salle, on_delete=models.CASCADE)
@@ -42,58 +48,85 @@ class show(models.Model):
         if self.start_date > self.end_date:
             raise ValidationError("Start date cannot be after end date.")
 
-        # Check for overlapping shows in the same salle
-
-        if self.movie and self.salle:  # Ensure movie and salle are set
-            tz = timezone.get_current_timezone()
-            current_show_start_date = self.start_date
-            current_show_end_date = self.end_date
-            duration_minutes = self.movie.duration
-
-            # pour vérifier les conflits de programmation.
-            current_date = current_show_start_date
-            while current_date <= current_show_end_date:
-                # Calculate start and end datetimes for the current show
-                show_datetime = datetime.combine(current_date, self.showtime, tzinfo=tz)
-                end_datetime = show_datetime + timedelta(minutes=duration_minutes)
-
-                # Check for existing shows in the same salle on this date
-                conflicting_shows = show.objects.filter(
-                    salle=self.salle,
-                    start_date__lte=current_date,
-                    end_date__gte=current_date
-                ).exclude(pk=self.pk)  # Exclude the current show when editing
-
-                for existing_show in conflicting_shows:
-                    existing_show_datetime = datetime.combine(current_date, existing_show.showtime, tzinfo=tz)
-                    existing_end_datetime = existing_show_datetime + timedelta(minutes=existing_show.movie.duration)
-
-                    # Vérifie s'il y a un chevauchement entre la séance actuelle et une séance existante :
-                    # Si l'heure de fin de la nouvelle séance est après le début de l'existante et
-                    # l'heure de début de la nouvelle séance est avant la fin de l'existante, il y a un conflit.
-                    if not (end_datetime <= existing_show_datetime or show_datetime >= existing_end_datetime):
-                        raise ValidationError(
-                            f"Show conflicts with '{existing_show.movie.movie_name}' "
-                            f"on {current_date.strftime('%Y-%m-%d')} from {existing_show.showtime.strftime('%I:%M %p')} "
-                            f"to {(existing_show_datetime + timedelta(minutes=existing_show.movie.duration)).strftime('%I:%M %p')} "
-                            f"in {self.salle.name}."
-                        )
-                # Passe à la date suivante dans la boucle.
-                current_date += timedelta(days=1)
+        # Check for overlapping shows in the same salle: une seule requête (durée du film jointe)
+        # puis un balayage des créneaux horaires sur toute la période.
+        if self.movie_id and self.salle_id:
+            conflict = find_show_conflict(self)
+            if conflict:
+                existing_show, conflict_date = conflict
+                raise ValidationError(conflict_message(existing_show, conflict_date, self.salle.name))
 
     def save(self, *args, **kwargs):
         # Run full_clean (which calls clean) before saving
         self.full_clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ShowOccurrence.rebuild([self])
 
     class Meta:
         indexes = [
             models.Index(fields=['start_date', 'end_date', 'showtime']),
+            models.Index(fields=['salle', 'start_date', 'end_date']),
+            models.Index(fields=['start_date', 'id']),
+        ]
+
+class ShowOccurrence(models.Model):
+    # Une ligne par jour de projection d'une séance, maintenue à chaque enregistrement de la séance
+    # (ou du film, dont la durée fixe end_datetime) pour que les pages publiques fassent une seule requête indexée.
+    show = models.ForeignKey(show, on_delete=models.CASCADE, related_name='occurrences')
+    date = models.DateField()
+    start_datetime = models.DateTimeField()
+    end_datetime = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['show', 'date'], name='unique_show_occurrence'),
         ]
+        indexes = [
+            models.Index(fields=['date', 'end_datetime']),
+        ]
+
+    def __str__(self):
+        return f"{self.show} on {self.date}"
+
+    @classmethod
+    def build(cls, show_obj):
+        tz = timezone.get_current_timezone()
+        duration = timedelta(minutes=show_obj.movie.duration)
+        occurrences = []
+        current_date = show_obj.start_date
+        while current_date <= show_obj.end_date:
+            start = timezone.make_aware(datetime.combine(current_date, show_obj.showtime), tz)
+            occurrences.append(cls(show=show_obj, date=current_date, start_datetime=start, end_datetime=start + duration))
+            current_date += timedelta(days=1)
+        return occurrences
+
+    @classmethod
+    def rebuild(cls, shows, batch_size=1000):
+        """Replace the occurrences of `shows` (saved instances with their movie loaded)."""
+        with transaction.atomic():
+            cls.objects.filter(show__in=[s.pk for s in shows]).delete()
+            occurrences = []
+            for show_obj in shows:
+                occurrences.extend(cls.build(show_obj))
+                if len(occurrences) >= batch_size:
+                    cls.objects.bulk_create(occurrences, batch_size=batch_size)
+                    occurrences = []
+            cls.objects.bulk_create(occurrences, batch_size=batch_size)
 
 class banner(models.Model):
     movie = models.ForeignKey(film, on_delete=models.CASCADE)
     url = models.URLField()
 
     def __str__(self):
-        return f"Banner for {self.movie.movie_name}"
\ No newline at end of file
+        return f"Banner for {self.movie.movie_name}"
+
+class RemoteImage(models.Model):
+    # Image distante (affiche ou bannière) servie en vignettes locales, voir thumbnails.py.
+    # Seules les URL enregistrées ici peuvent être récupérées par le proxy d'images.
+    url = models.URLField()
+    url_hash = models.CharField(max_length=64, unique=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.url
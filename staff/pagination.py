@@ -0,0 +1,70 @@
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+# Pagination par clé (« seek ») : la page suivante reprend après les valeurs de tri de la dernière ligne,
+# ce qui reste une simple recherche d'index quelle que soit la profondeur, contrairement à OFFSET.
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return the list of key values in `token`; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _clean_values(model, ordering, values):
+    # Chaque valeur du curseur est convertie par le champ de tri correspondant : un curseur forgé
+    # (« abc » pour un id, une liste pour une date...) lève ValueError au lieu d'atteindre l'ORM.
+    if len(values) != len(ordering):
+        raise ValueError("Invalid cursor")
+    cleaned = []
+    for (field, _), value in zip(ordering, values):
+        if value is None or isinstance(value, (list, dict, bool)):
+            raise ValueError("Invalid cursor")
+        try:
+            cleaned.append(model._meta.get_field(field).to_python(value))
+        except (FieldDoesNotExist, ValidationError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+    return cleaned
+
+
+def _after(ordering, values):
+    # (a, b) > (va, vb) <=> a > va OR (a = va AND b > vb), avec < pour les colonnes décroissantes.
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(ordering, values):
+        lookup = f"{field}__lt" if descending else f"{field}__gt"
+        condition |= equal & Q(**{lookup: value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=25):
+    """
+    One page of `queryset` ordered by `ordering`, a list of (field, descending) pairs whose last
+    field is unique. Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises ValueError when `cursor` is malformed or does not match `ordering`.
+    """
+    if cursor:
+        values = _clean_values(queryset.model, ordering, decode_cursor(cursor))
+        queryset = queryset.filter(_after(ordering, values))
+    queryset = queryset.order_by(*[f"-{field}" if descending else field for field, descending in ordering])
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, field) for field, _ in ordering])
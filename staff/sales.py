@@ -0,0 +1,52 @@
+from datetime import timedelta
+from django.db.models import Sum
+from django.utils import timezone
+
+# Lecture des agrégats de ventes (booking.ShowSales, FilmDailySales, SalleDailySales) :
+# aucune réservation n'est relue ni analysée ici.
+SALES_GROUPS = ('film', 'salle', 'show', 'day')
+
+
+def default_sales_range():
+    today = timezone.localdate()
+    return today - timedelta(days=30), today + timedelta(days=30)
+
+
+def sales_rows(group, date_from, date_to, limit=500):
+    from booking.models import ShowSales, FilmDailySales, SalleDailySales
+
+    if group == 'film':
+        rows = (FilmDailySales.objects.filter(date__range=(date_from, date_to))
+                .values('film_id', 'film__movie_name')
+                .annotate(seats_sold=Sum('seats_sold'), revenue=Sum('revenue'))
+                .order_by('-revenue'))
+        return [{'film_id': r['film_id'], 'film': r['film__movie_name'],
+                 'seats_sold': r['seats_sold'], 'revenue': r['revenue']} for r in rows[:limit]]
+    if group == 'salle':
+        rows = (SalleDailySales.objects.filter(date__range=(date_from, date_to))
+                .values('salle_id', 'salle__name')
+                .annotate(seats_sold=Sum('seats_sold'), revenue=Sum('revenue'))
+                .order_by('-revenue'))
+        return [{'salle_id': r['salle_id'], 'salle': r['salle__name'],
+                 'seats_sold': r['seats_sold'], 'revenue': r['revenue']} for r in rows[:limit]]
+    if group == 'day':
+        rows = (FilmDailySales.objects.filter(date__range=(date_from, date_to))
+                .values('date')
+                .annotate(seats_sold=Sum('seats_sold'), revenue=Sum('revenue'))
+                .order_by('date'))
+        return [{'date': r['date'].isoformat(), 'seats_sold': r['seats_sold'], 'revenue': r['revenue']}
+                for r in rows[:limit]]
+    rows = (ShowSales.objects.filter(show_date__range=(date_from, date_to))
+            .values('show_id', 'show_date', 'seats_sold', 'revenue', 'show__showtime',
+                    'show__movie__movie_name', 'show__salle__name', 'show__salle__capacity')
+            .order_by('show_date', 'show__showtime'))
+    return [{
+        'show_id': r['show_id'],
+        'show_date': r['show_date'].isoformat(),
+        'showtime': r['show__showtime'].strftime('%H:%M'),
+        'film': r['show__movie__movie_name'],
+        'salle': r['show__salle__name'],
+        'seats_sold': r['seats_sold'],
+        'revenue': r['revenue'],
+        'occupancy': round(r['seats_sold'] / r['show__salle__capacity'], 3) if r['show__salle__capacity'] else 0,
+    } for r in rows[:limit]]
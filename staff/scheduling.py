@@ -0,0 +1,224 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+SECONDS_PER_DAY = 24 * 60 * 60
+ONE_DAY = timedelta(days=1)
+
+# Une séance jouée chaque jour de start_date à end_date, de start à end (secondes depuis minuit).
+# end peut dépasser minuit : la fin déborde alors sur le lendemain.
+Slot = namedtuple('Slot', ['ref', 'salle_id', 'start_date', 'end_date', 'start', 'end'])
+
+# Morceau d'un créneau contenu dans une seule journée.
+_Segment = namedtuple('_Segment', ['start', 'end', 'start_date', 'end_date', 'slot'])
+
+
+def make_slot(ref, salle_id, showtime, duration, start_date, end_date):
+    start = showtime.hour * 3600 + showtime.minute * 60 + showtime.second
+    return Slot(ref, salle_id, start_date, end_date, start, start + duration * 60)
+
+
+def _segments(slot):
+    yield _Segment(slot.start, min(slot.end, SECONDS_PER_DAY), slot.start_date, slot.end_date, slot)
+    if slot.end > SECONDS_PER_DAY:
+        yield _Segment(0, slot.end - SECONDS_PER_DAY, slot.start_date + ONE_DAY, slot.end_date + ONE_DAY, slot)
+
+
+def iter_conflicts(slots):
+    """
+    Sweep over the time of day, per salle, and yield (earlier, later, first_date) for every
+    pair of slots that overlap on at least one day. first_date is the first day of the overlap.
+    A pair may be yielded twice when one of the slots runs past midnight.
+    """
+    by_salle = {}
+    for slot in slots:
+        by_salle.setdefault(slot.salle_id, []).extend(_segments(slot))
+
+    for segments in by_salle.values():
+        segments.sort(key=lambda seg: seg.start)
+        active = []
+        for seg in segments:
+            active = [a for a in active if a.end > seg.start]
+            for a in active:
+                if a.slot is seg.slot:
+                    continue
+                first_date = max(a.start_date, seg.start_date)
+                if first_date <= min(a.end_date, seg.end_date):
+                    yield a.slot, seg.slot, first_date
+            active.append(seg)
+
+
+def find_show_conflict(candidate):
+    """
+    Return (existing_show, date) for the first show in the same salle that overlaps
+    `candidate`, or None. Runs a single query with the film duration joined.
+    """
+    from .models import show
+
+    existing = (
+        show.objects
+        .filter(
+            salle_id=candidate.salle_id,
+            start_date__lte=candidate.end_date + ONE_DAY,
+            end_date__gte=candidate.start_date - ONE_DAY,
+        )
+        .exclude(pk=candidate.pk)
+        .select_related('movie')
+        .only('showtime', 'start_date', 'end_date', 'salle_id', 'movie__movie_name', 'movie__duration')
+    )
+    new_slot = make_slot(candidate, candidate.salle_id, candidate.showtime, candidate.movie.duration,
+                         candidate.start_date, candidate.end_date)
+    slots = [new_slot] + [
+        make_slot(s, s.salle_id, s.showtime, s.movie.duration, s.start_date, s.end_date) for s in existing
+    ]
+
+    found = None
+    for a, b, first_date in iter_conflicts(slots):
+        if a is not new_slot and b is not new_slot:
+            continue
+        other = b.ref if a is new_slot else a.ref
+        if found is None or (first_date, other.showtime) < (found[1], found[0].showtime):
+            found = (other, first_date)
+    return found
+
+
+def conflict_message(existing_show, on_date, salle_name):
+    existing_show_datetime = datetime.combine(on_date, existing_show.showtime)
+    existing_end_datetime = existing_show_datetime + timedelta(minutes=existing_show.movie.duration)
+    return (
+        f"Show conflicts with '{existing_show.movie.movie_name}' "
+        f"on {on_date.strftime('%Y-%m-%d')} from {existing_show.showtime.strftime('%I:%M %p')} "
+        f"to {existing_end_datetime.strftime('%I:%M %p')} "
+        f"in {salle_name}."
+    )
+
+
+def read_season(stream, fmt):
+    """Read a season plan (CSV with a header row, or a JSON list of objects) into a list of dicts."""
+    import csv
+    import io
+    import json
+
+    text = stream.read()
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+    if fmt == 'json':
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError("JSON season plan must be a list of objects.")
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                raise ValueError(f"Row {number}: expected an object, got {type(row).__name__}.")
+        return rows
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def plan_season(rows):
+    """
+    Validate season plan rows against each other and against the database, in memory.
+    Returns (shows, errors): unsaved show instances, and every problem found as "Row n: ..." messages.
+    Only three queries are run whatever the number of rows.
+    """
+    from .models import film, show, Salle
+
+    films_by_id, films_by_name = {}, {}
+    for f in film.objects.only('movie_name', 'duration'):
+        films_by_id[str(f.pk)] = f
+        films_by_name.setdefault(f.movie_name.strip().lower(), f)
+    salles_by_id, salles_by_name = {}, {}
+    for s in Salle.objects.all():
+        salles_by_id[str(s.pk)] = s
+        salles_by_name[s.name.strip().lower()] = s
+
+    errors = []
+    planned = []  # (row_number, show)
+    for number, row in enumerate(rows, start=1):
+        row = {key.strip().lower(): '' if value is None else str(value).strip() for key, value in row.items() if key}
+        key = row.get('film', '')
+        movie = films_by_id.get(key) or films_by_name.get(key.lower())
+        key = row.get('salle', '')
+        salle = salles_by_id.get(key) or salles_by_name.get(key.lower())
+        problems = []
+        if movie is None:
+            problems.append(f"unknown film '{row.get('film', '')}'")
+        if salle is None:
+            problems.append(f"unknown salle '{row.get('salle', '')}'")
+        try:
+            showtime = datetime.strptime(row.get('showtime', ''), '%H:%M:%S' if row.get('showtime', '').count(':') == 2 else '%H:%M').time()
+        except ValueError:
+            problems.append(f"invalid showtime '{row.get('showtime', '')}' (expected HH:MM)")
+        try:
+            start_date = datetime.strptime(row.get('start_date', ''), '%Y-%m-%d').date()
+            end_date = datetime.strptime(row.get('end_date', ''), '%Y-%m-%d').date()
+            if start_date > end_date:
+                problems.append("Start date cannot be after end date.")
+        except ValueError:
+            problems.append("dates must use the YYYY-MM-DD format")
+        try:
+            price = int(row.get('price', ''))
+            if price < 0:
+                problems.append("price cannot be negative")
+        except ValueError:
+            problems.append(f"invalid price '{row.get('price', '')}'")
+
+        if problems:
+            errors.append(f"Row {number}: {'; '.join(problems)}.")
+            continue
+        planned.append((number, show(movie=movie, salle=salle, showtime=showtime, price=price,
+                                     start_date=start_date, end_date=end_date)))
+
+    if not planned:
+        return [], errors
+
+    first_day = min(s.start_date for _, s in planned) - ONE_DAY
+    last_day = max(s.end_date for _, s in planned) + ONE_DAY
+    existing = (
+        show.objects
+        .filter(salle_id__in={s.salle_id for _, s in planned}, start_date__lte=last_day, end_date__gte=first_day)
+        .select_related('movie', 'salle')
+        .only('showtime', 'start_date', 'end_date', 'salle__name', 'movie__movie_name', 'movie__duration')
+    )
+    slots = [make_slot(('row', number, s), s.salle_id, s.showtime, s.movie.duration, s.start_date, s.end_date)
+             for number, s in planned]
+    slots += [make_slot(('db', None, s), s.salle_id, s.showtime, s.movie.duration, s.start_date, s.end_date)
+              for s in existing]
+
+    reported = set()
+    conflicts = []
+    for a, b, first_date in iter_conflicts(slots):
+        (kind_a, row_a, show_a), (kind_b, row_b, show_b) = a.ref, b.ref
+        if kind_a == 'db' and kind_b == 'db':
+            continue
+        if kind_a == 'db' or (kind_b == 'row' and row_b < row_a):
+            (kind_a, row_a, show_a), (kind_b, row_b, show_b) = (kind_b, row_b, show_b), (kind_a, row_a, show_a)
+        pair = (row_a, kind_b, row_b if kind_b == 'row' else show_b.pk)
+        if pair in reported:
+            continue
+        reported.add(pair)
+        if kind_b == 'db':
+            message = conflict_message(show_b, first_date, show_b.salle.name)
+        else:
+            message = (f"Show conflicts with row {row_b} ('{show_b.movie.movie_name}' at "
+                       f"{show_b.showtime.strftime('%I:%M %p')}) on {first_date.strftime('%Y-%m-%d')} "
+                       f"in {show_a.salle.name}.")
+        conflicts.append((row_a, f"Row {row_a}: {message}"))
+
+    errors.extend(message for _, message in sorted(conflicts))
+    return [s for _, s in planned], errors
+
+
+def import_season(rows, batch_size=500):
+    """Validate a season plan and insert it with bulk_create in one transaction, or raise ValidationError."""
+    from django.core.exceptions import ValidationError
+    from django.db import transaction
+    from .models import show, ShowOccurrence
+    from .catalogue import bump_catalogue_version
+
+    shows, errors = plan_season(rows)
+    if errors:
+        raise ValidationError(errors)
+    with transaction.atomic():
+        created = show.objects.bulk_create(shows, batch_size=batch_size)
+        ShowOccurrence.rebuild(created)
+        # bulk_create n'envoie pas de signaux : on invalide le cache des pages publiques nous-mêmes.
+        transaction.on_commit(bump_catalogue_version)
+        return created
@@ -0,0 +1,176 @@
+import re
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, router, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from .models import film
+
+# Recherche plein texte des films (nom, résumé, genre, langue) dans une table virtuelle SQLite FTS5,
+# tenue à jour par les signaux de film (voir signals.py). Sans FTS5 (autre base, SQLite compilé sans),
+# on retombe sur des icontains, plus lents mais équivalents.
+TABLE = 'staff_film_search'
+COLUMNS = ('movie_name', 'movie_plot', 'movie_genre', 'movie_lang')
+# Poids bm25 dans l'ordre des colonnes : un mot du titre compte bien plus qu'un mot du résumé.
+WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+SEARCH_LIMIT = 50
+SUGGEST_LIMIT = 8
+SUGGEST_MIN_LENGTH = 2
+MAX_TERMS = 8
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE {TABLE} USING fts5({', '.join(COLUMNS)}, "
+    "tokenize = 'unicode61 remove_diacritics 1', prefix = '2 3')"
+)
+
+# Alias de base -> FTS5 utilisable, vérifié une fois par processus.
+_available = {}
+
+
+def search_terms(text):
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+def match_expression(text, column=None, all_prefixes=False):
+    """
+    FTS5 query matching every word of `text`, the last one as a prefix (the user may still be typing),
+    or all of them with `all_prefixes`.
+    """
+    terms = [f'"{term}"' for term in search_terms(text)]
+    if not terms:
+        return None
+    terms = [f'{term}*' for term in terms] if all_prefixes else terms[:-1] + [f'{terms[-1]}*']
+    expression = ' '.join(terms)
+    return f'{column} : ({expression})' if column else expression
+
+
+def _table_exists(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE])
+    return cursor.fetchone() is not None
+
+
+def _fill(cursor):
+    cursor.execute(
+        f"INSERT INTO {TABLE}(rowid, {', '.join(COLUMNS)}) "
+        f"SELECT id, {', '.join(COLUMNS)} FROM {film._meta.db_table}"
+    )
+
+
+def ensure_index(using=DEFAULT_DB_ALIAS, refresh=False):
+    """Create (and fill) the FTS5 table on first use. Returns False when FTS5 is not available."""
+    if using in _available and not refresh:
+        return _available[using]
+    connection = connections[using]
+    available = False
+    if connection.vendor == 'sqlite':
+        try:
+            with connection.cursor() as cursor:
+                if not _table_exists(cursor):
+                    with transaction.atomic(using=using):
+                        if not _table_exists(cursor):
+                            cursor.execute(CREATE_SQL)
+                            _fill(cursor)
+            available = True
+        except OperationalError:
+            pass
+    _available[using] = available
+    return available
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Drop and refill the FTS5 table (after bulk imports, which send no signals). Returns the rows indexed."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return 0
+    try:
+        # Dans une seule transaction : les recherches voient l'ancien index jusqu'au bout.
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cursor.execute(CREATE_SQL)
+            _fill(cursor)
+    except OperationalError:
+        _available[using] = False
+        return 0
+    _available[using] = True
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {TABLE}")
+        return cursor.fetchone()[0]
+
+
+def index_film(instance, using=DEFAULT_DB_ALIAS):
+    if not ensure_index(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [instance.pk])
+        cursor.execute(
+            f"INSERT INTO {TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            [instance.pk, *(getattr(instance, column) for column in COLUMNS)],
+        )
+
+
+def unindex_film(pk, using=DEFAULT_DB_ALIAS):
+    if ensure_index(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [pk])
+
+
+def _fts_rows(using, sql, params):
+    # Les réplicas en lecture seule ne créent pas la table : elle y arrive à la copie suivante,
+    # en attendant (OperationalError) on passe par le repli.
+    if connections[using].vendor != 'sqlite' or (using == DEFAULT_DB_ALIAS and not ensure_index(using)):
+        return None
+    try:
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+    except OperationalError:
+        return None
+
+
+def _fallback(text, fields):
+    query = Q()
+    for term in search_terms(text):
+        query &= Q(*(Q(**{f'{field}__icontains': term}) for field in fields), _connector=Q.OR)
+    name = text.strip()
+    return film.objects.filter(query).annotate(
+        relevance=Case(
+            When(movie_name__istartswith=name, then=Value(0)),
+            When(movie_name__icontains=name, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('relevance', 'movie_name', 'id')
+
+
+def search_films(text, limit=SEARCH_LIMIT):
+    """Films matching every word of `text`, most relevant first."""
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    using = router.db_for_read(film)
+    rows = _fts_rows(
+        using,
+        f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY bm25({TABLE}, {', '.join(map(str, WEIGHTS))}) LIMIT %s",
+        [expression, limit],
+    )
+    if rows is None:
+        return list(_fallback(text, COLUMNS).using(using)[:limit])
+    films = film.objects.using(using).in_bulk([row[0] for row in rows])
+    return [films[row[0]] for row in rows if row[0] in films]
+
+
+def suggest_films(text, limit=SUGGEST_LIMIT):
+    """(id, name) of the films whose title has words starting with those typed, for autocompletion."""
+    if len(text.strip()) < SUGGEST_MIN_LENGTH:
+        return []
+    expression = match_expression(text, column='movie_name', all_prefixes=True)
+    if expression is None:
+        return []
+    using = router.db_for_read(film)
+    # Le titre est lu dans la table FTS elle-même : une seule requête.
+    rows = _fts_rows(
+        using,
+        f"SELECT rowid, movie_name FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY rank LIMIT %s",
+        [expression, limit],
+    )
+    if rows is None:
+        return list(_fallback(text, ['movie_name']).using(using).values_list('id', 'movie_name')[:limit])
+    return [tuple(row) for row in rows]
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .catalogue import bump_catalogue_version
+from .thumbnails import register_image, release_image
+from .search import ensure_index, index_film, unindex_film
+from .models import film, show, banner, Salle, ShowOccurrence
+
+# La durée du film fixe la fin de chaque projection : on recalcule les occurrences de ses séances,
+# seulement quand elle a changé (durée lue avant l'enregistrement, voir remember_previous_values).
+@receiver(post_save, sender=film)
+def rebuild_film_occurrences(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'duration' not in update_fields):
+        return
+    if instance.duration != getattr(instance, '_previous_duration', None):
+        shows = list(show.objects.filter(movie=instance))
+        for show_obj in shows:
+            show_obj.movie = instance
+        ShowOccurrence.rebuild(shows)
+
+# Toute modification du catalogue invalide les pages publiques en cache (après validation de la transaction).
+@receiver(post_save, sender=film)
+@receiver(post_save, sender=show)
+@receiver(post_save, sender=banner)
+@receiver(post_save, sender=Salle)
+@receiver(post_delete, sender=film)
+@receiver(post_delete, sender=show)
+@receiver(post_delete, sender=banner)
+@receiver(post_delete, sender=Salle)
+def invalidate_catalogue(sender, **kwargs):
+    transaction.on_commit(bump_catalogue_version)
+
+# Images distantes : l'URL d'une affiche ou d'une bannière est enregistrée pour le proxy de vignettes ;
+# quand elle change, l'ancienne image (et ses fichiers) est oubliée si plus rien ne l'utilise.
+# La même requête relit la durée d'un film pour rebuild_film_occurrences.
+@receiver(pre_save, sender=film)
+@receiver(pre_save, sender=banner)
+def remember_previous_values(sender, instance, **kwargs):
+    fields = ['url', 'duration'] if sender is film else ['url']
+    previous = (sender.objects.filter(pk=instance.pk).values(*fields).first() if instance.pk else None) or {}
+    instance._previous_url = previous.get('url')
+    instance._previous_duration = previous.get('duration')
+
+@receiver(post_save, sender=film)
+@receiver(post_save, sender=banner)
+def register_remote_image(sender, instance, **kwargs):
+    register_image(instance.url)
+    previous = getattr(instance, '_previous_url', None)
+    if previous and previous != instance.url:
+        transaction.on_commit(lambda: release_image(previous))
+
+@receiver(post_delete, sender=film)
+@receiver(post_delete, sender=banner)
+def release_remote_image(sender, instance, **kwargs):
+    transaction.on_commit(lambda: release_image(instance.url))
+
+# Index de recherche plein texte : mis à jour dans la même transaction que le film.
+@receiver(post_save, sender=film)
+def index_film_search(sender, instance, using, **kwargs):
+    index_film(instance, using)
+
+@receiver(post_delete, sender=film)
+def unindex_film_search(sender, instance, using, **kwargs):
+    unindex_film(instance.pk, using)
+
+# Base créée ou migrée : la table FTS5 est (re)créée et remplie si elle manque.
+def create_search_index(sender, using, **kwargs):
+    ensure_index(using, refresh=True)
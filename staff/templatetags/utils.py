@@ -1,5 +1,6 @@
 from django import template
 from datetime import datetime, timedelta
+from staff.thumbnails import is_registered, thumbnail_url, thumbnail_widths
 
 register = template.Library()
 
@@ -13,4 +14,18 @@ def bstatus(value):
 
 @register.filter
 def tformat(value, format):
-    return value.strftime(format)
\ No newline at end of file
+    return value.strftime(format)
+
+# Vignette locale d'une image distante : {{ film.url|thumb:320 }}
+@register.filter
+def thumb(url, width):
+    return thumbnail_url(url, width)
+
+# srcset de toutes les largeurs disponibles, jusqu'à max_width : {{ film.url|thumb_srcset:640 }}
+# Vide tant que l'image n'est pas enregistrée : le navigateur garde alors le src (l'URL d'origine).
+@register.filter
+def thumb_srcset(url, max_width=None):
+    if not url or not is_registered(url):
+        return ''
+    widths = [w for w in thumbnail_widths() if max_width is None or w <= int(max_width)]
+    return ', '.join(f"{thumbnail_url(url, w)} {w}w" for w in widths)
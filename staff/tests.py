@@ -1,3 +1,195 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+from datetime import date, time, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from PIL import Image
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from .models import RemoteImage, Salle, ShowOccurrence, film, show
+from .pagination import decode_cursor, encode_cursor, keyset_page
+from .scheduling import iter_conflicts, make_slot
+from .thumbnails import url_hash
 
-# Create your tests here.
+DAY = date(2025, 6, 1)
+
+
+def days(n):
+    return DAY + timedelta(days=n)
+
+
+def pairs(slots):
+    return {(a.ref, b.ref, first_date) for a, b, first_date in iter_conflicts(slots)}
+
+
+class IterConflictsTests(SimpleTestCase):
+    def test_overlapping_slots(self):
+        slots = [
+            make_slot('a', 1, time(18), 120, days(0), days(5)),
+            make_slot('b', 1, time(19), 90, days(3), days(10)),
+        ]
+        self.assertEqual(pairs(slots), {('a', 'b', days(3))})
+
+    def test_other_salle_or_other_days(self):
+        slots = [
+            make_slot('a', 1, time(18), 120, days(0), days(5)),
+            make_slot('b', 2, time(18), 120, days(0), days(5)),
+            make_slot('c', 1, time(18), 120, days(6), days(9)),
+        ]
+        self.assertEqual(pairs(slots), set())
+
+    def test_adjacent_slots(self):
+        # Une séance peut commencer à la minute où la précédente se termine.
+        slots = [
+            make_slot('a', 1, time(18), 120, days(0), days(5)),
+            make_slot('b', 1, time(20), 90, days(0), days(5)),
+            make_slot('c', 1, time(16), 120, days(0), days(5)),
+        ]
+        self.assertEqual(pairs(slots), set())
+
+    def test_overnight_slot(self):
+        # 23:00 + 2 h déborde sur le lendemain : conflit avec la séance de 00:30 du jour suivant la dernière date.
+        slots = [
+            make_slot('late', 1, time(23), 120, days(0), days(2)),
+            make_slot('early', 1, time(0, 30), 60, days(3), days(5)),
+        ]
+        self.assertEqual(pairs(slots), {('late', 'early', days(3))})
+
+    def test_overnight_slot_ending_at_the_next_show(self):
+        slots = [
+            make_slot('late', 1, time(23), 90, days(0), days(2)),
+            make_slot('early', 1, time(0, 30), 60, days(1), days(5)),
+        ]
+        self.assertEqual(pairs(slots), set())
+
+
+class KeysetPageTests(TestCase):
+    def pages(self, queryset, ordering, limit):
+        rows, cursor, count = [], None, 0
+        while True:
+            page, cursor = keyset_page(queryset, ordering, cursor, limit)
+            rows += page
+            count += 1
+            if cursor is None:
+                return rows, count
+
+    def test_pages_cover_every_row_once(self):
+        # Noms en double : la colonne unique (id) départage les lignes d'une même valeur.
+        for name in 'CABBACBDAC':
+            film.objects.create(movie_name=name, url='http://example.com/f.jpg')
+        for ordering in ([('movie_name', False), ('id', False)], [('movie_name', True), ('id', True)]):
+            expected = list(film.objects.order_by(*[f"-{f}" if d else f for f, d in ordering]))
+            for limit in (1, 3, 10, 20):
+                rows, count = self.pages(film.objects.all(), ordering, limit)
+                self.assertEqual(rows, expected)
+                self.assertEqual(count, max(1, -(-len(expected) // limit)))
+
+    def test_date_cursor_round_trip(self):
+        movie = film.objects.create(movie_name='F', url='http://example.com/f.jpg')
+        for number in range(3):
+            show.objects.create(
+                movie=movie, salle=Salle.objects.create(name=f'H{number}', capacity=50), showtime=time(18),
+                price=10, start_date=DAY, end_date=days(6),
+            )
+        ordering = [('date', True), ('id', True)]
+        rows, _ = self.pages(ShowOccurrence.objects.all(), ordering, 4)
+        self.assertEqual(len(rows), 21)
+        self.assertEqual(rows, list(ShowOccurrence.objects.order_by('-date', '-id')))
+        page, cursor = keyset_page(ShowOccurrence.objects.all(), ordering, None, 4)
+        self.assertEqual(decode_cursor(cursor), [page[-1].date.isoformat(), page[-1].id])
+
+    def test_forged_cursors(self):
+        film.objects.create(movie_name='F', url='http://example.com/f.jpg')
+        ordering = [('movie_name', False), ('id', False)]
+        for cursor in ('not base64!', encode_cursor({'id': 1}), encode_cursor(['F']), encode_cursor(['F', 'abc']),
+                       encode_cursor(['F', [1]]), encode_cursor([None, 1]), encode_cursor(['F', 1, 2])):
+            with self.assertRaises(ValueError, msg=cursor):
+                keyset_page(film.objects.all(), ordering, cursor)
+
+
+def png_bytes(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    # Serveur d'images local : /poster.png et /other.png existent, tout le reste répond 404.
+    images = {'/poster.png': png_bytes(400, 600), '/other.png': png_bytes(200, 100)}
+
+    def do_GET(self):
+        data = self.images.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThumbnailProxyTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        overridden = override_settings(THUMBNAIL_DIR=directory)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        cache.clear()
+
+    def get_thumb(self, url, width, accept='image/webp,*/*'):
+        return self.client.get(reverse('image_thumb', args=[url_hash(url), width]), HTTP_ACCEPT=accept)
+
+    def image_size(self, response):
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as img:
+            return img.format, img.size
+
+    def test_registered_image_is_fetched_and_resized(self):
+        url = f'{self.base_url}/poster.png'
+        film.objects.create(movie_name='F', url=url)
+        self.assertTrue(RemoteImage.objects.filter(url_hash=url_hash(url)).exists())
+        response = self.get_thumb(url, 160)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(self.image_size(response), ('WEBP', (160, 240)))
+        response = self.get_thumb(url, 320, accept='image/*')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(self.image_size(response), ('JPEG', (320, 480)))
+        # Jamais agrandie au-delà de l'original.
+        self.assertEqual(self.image_size(self.get_thumb(url, 640))[1], (400, 600))
+
+    def test_fetch_failure_redirects_to_the_original(self):
+        url = f'{self.base_url}/missing.png'
+        film.objects.create(movie_name='F', url=url)
+        response = self.get_thumb(url, 160)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], url)
+
+    def test_url_change_forgets_the_old_image(self):
+        old_url, new_url = f'{self.base_url}/poster.png', f'{self.base_url}/other.png'
+        movie = film.objects.create(movie_name='F', url=old_url)
+        self.assertEqual(self.get_thumb(old_url, 160).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.url = new_url
+            movie.save()
+        self.assertEqual(self.get_thumb(old_url, 160).status_code, 404)
+        self.assertEqual(self.image_size(self.get_thumb(new_url, 160))[1], (160, 80))
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import shutil
+import threading
+import urllib.request
+from io import BytesIO
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+# Proxy d'images : chaque affiche ou bannière distante est téléchargée une fois, puis redimensionnée
+# à la demande en WebP ou JPEG. Tout est rangé sur disque sous THUMBNAIL_DIR/<sha256 de l'URL>/ :
+# une nouvelle URL donne un nouveau dossier, l'ancien est supprimé quand plus rien ne l'utilise.
+FORMATS = {'webp': ('webp', 'image/webp'), 'jpeg': ('jpg', 'image/jpeg')}
+
+
+class ThumbnailError(Exception):
+    def __init__(self, url, message):
+        super().__init__(message)
+        self.url = url
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def thumbnail_widths():
+    return getattr(settings, 'THUMBNAIL_WIDTHS', (80, 160, 320, 640, 1280))
+
+
+def _registered_key(digest):
+    return f"thumb-registered:{digest}"
+
+
+def is_registered(url):
+    """True when the proxy knows `url` (cached; a miss is re-checked after a minute)."""
+    from .models import RemoteImage
+    digest = url_hash(url)
+    registered = cache.get(_registered_key(digest))
+    if registered is None:
+        registered = RemoteImage.objects.filter(url_hash=digest).exists()
+        cache.set(_registered_key(digest), registered, None if registered else 60)
+    return registered
+
+
+def thumbnail_url(url, width):
+    """The proxy URL of a `width` thumbnail, or `url` itself while the image is not registered (the proxy would 404)."""
+    if not url:
+        return ''
+    if not is_registered(url):
+        return url
+    return reverse('image_thumb', args=[url_hash(url), int(width)])
+
+
+def image_dir(digest):
+    return Path(getattr(settings, 'THUMBNAIL_DIR', settings.BASE_DIR / 'thumbnails')) / digest
+
+
+def register_image(url):
+    from .models import RemoteImage
+    if url:
+        digest = url_hash(url)
+        RemoteImage.objects.get_or_create(url_hash=digest, defaults={'url': url})
+        transaction.on_commit(lambda: cache.set(_registered_key(digest), True, None))
+
+
+def release_image(url):
+    """Forget an image no film or banner uses any more, with its files."""
+    from .models import RemoteImage, film, banner
+    if not url or film.objects.filter(url=url).exists() or banner.objects.filter(url=url).exists():
+        return
+    digest = url_hash(url)
+    RemoteImage.objects.filter(url_hash=digest).delete()
+    cache.delete(_registered_key(digest))
+    shutil.rmtree(image_dir(digest), ignore_errors=True)
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _download(url):
+    if not url.startswith(('http://', 'https://')):
+        raise ThumbnailError(url, "Only http(s) images can be fetched.")
+    limit = getattr(settings, 'THUMBNAIL_MAX_BYTES', 10 * 1024 * 1024)
+    request = urllib.request.Request(url, headers={'User-Agent': 'Morro_Cine thumbnailer'})
+    try:
+        with urllib.request.urlopen(request, timeout=getattr(settings, 'THUMBNAIL_FETCH_TIMEOUT', 10)) as response:
+            data = response.read(limit + 1)
+    except (OSError, ValueError) as exc:
+        raise ThumbnailError(url, f"Could not fetch the image: {exc}") from exc
+    if len(data) > limit:
+        raise ThumbnailError(url, "The image is too large.")
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img.verify()
+    except Exception as exc:
+        raise ThumbnailError(url, f"Not a valid image: {exc}") from exc
+    return data
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(key):
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def source_path(image):
+    """The original image on disk, downloaded on first use."""
+    path = image_dir(image.url_hash) / 'source'
+    if path.exists():
+        return path
+    # Un seul téléchargement par image et par processus ; un échec est mémorisé quelques minutes
+    # pour ne pas solliciter à chaque page un serveur distant en panne.
+    failed_key = f"thumb-failed:{image.url_hash}"
+    if cache.get(failed_key):
+        raise ThumbnailError(image.url, "The image could not be fetched recently.")
+    with _lock_for(image.url_hash):
+        if not path.exists():
+            try:
+                data = _download(image.url)
+            except ThumbnailError:
+                cache.set(failed_key, True, 300)
+                raise
+            _write(path, data)
+            type(image).objects.filter(pk=image.pk).update(fetched_at=timezone.now())
+    return path
+
+
+def render_thumbnail(source, width, fmt):
+    """Resize `source` to at most `width` pixels wide (never enlarged), encoded as WebP or JPEG."""
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        if fmt == 'webp':
+            img.save(buffer, 'WEBP', quality=80, method=4)
+        else:
+            img.convert('RGB').save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def thumbnail_path(digest, width, fmt):
+    """
+    Path of the `width`/`fmt` variant of a registered image, rendering it if needed.
+    Returns None for an unknown hash; raises ThumbnailError when the image cannot be fetched.
+    """
+    from .models import RemoteImage
+    extension, _ = FORMATS[fmt]
+    path = image_dir(digest) / f'{width}.{extension}'
+    if path.exists():
+        return path
+    image = RemoteImage.objects.filter(url_hash=digest).first()
+    if image is None:
+        return None
+    source = source_path(image)
+    with _lock_for(f'{digest}:{width}:{fmt}'):
+        if not path.exists():
+            try:
+                _write(path, render_thumbnail(source, width, fmt))
+            except OSError as exc:
+                raise ThumbnailError(image.url, f"Could not resize the image: {exc}") from exc
+    return path
@@ -5,10 +5,16 @@ app_name = 'staff'
 
 urlpatterns = [
     path('', views.StaffDashboardView.as_view(), name='dashboard'),
+    path('section/<str:section>/', views.DashboardSectionView.as_view(), name='dashboard_section'),
+    path('sales/', views.SalesDataView.as_view(), name='sales'),
+    path('slow-requests/', views.SlowRequestsView.as_view(), name='slow_requests'),
+    path('waiting-rooms/', views.WaitingRoomsView.as_view(), name='waiting_rooms'),
+    path('bookings/export/', views.BookingExportView.as_view(), name='booking_export'),
     path('film/add/', views.FilmCreateView.as_view(), name='film_add'),
     path('film/<int:pk>/edit/', views.FilmUpdateView.as_view(), name='film_edit'),
     path('film/<int:pk>/delete/', views.FilmDeleteView.as_view(), name='film_delete'),
     path('show/add/', views.ShowCreateView.as_view(), name='show_add'),
+    path('show/import/', views.ShowImportView.as_view(), name='show_import'),
     path('show/<int:pk>/edit/', views.ShowUpdateView.as_view(), name='show_edit'),
     path('show/<int:pk>/delete/', views.ShowDeleteView.as_view(), name='show_delete'),
     path('banner/add/', views.BannerCreateView.as_view(), name='banner_add'),
@@ -1,9 +1,21 @@
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView, TemplateView, View
+from django.http import StreamingHttpResponse, HttpResponseBadRequest, JsonResponse
 from django.urls import reverse_lazy
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+from django.core.exceptions import ValidationError
+from django.contrib import messages
 from .models import film, show, banner, Salle
-from .forms import FilmForm, ShowForm, BannerForm, SalleForm
+from .forms import FilmForm, ShowForm, BannerForm, SalleForm, SeasonImportForm
+from .scheduling import read_season, import_season
+from .exports import EXPORT_FORMATS, parse_export_filters, export_rows, iter_export
+from .sales import SALES_GROUPS, default_sales_range, sales_rows
+from .pagination import keyset_page
+from movieticket_new.timing import slow_requests
+from movieticket_new.db_router import use_primary
+from booking.admission import cache_is_shared, close_room, open_room, open_rooms, room_status
 
 def staff_required(user):
     return user.is_staff or user.is_superuser
@@ -12,18 +24,168 @@ class StaffRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         return staff_required(self.request.user)
 
+    def dispatch(self, request, *args, **kwargs):
+        # Le personnel relit ce qu'il vient de modifier : pas de réplica.
+        with use_primary():
+            return super().dispatch(request, *args, **kwargs)
+
 class StaffDashboardView(StaffRequiredMixin, ListView):
     template_name = 'staff/dashboard.html'
     context_object_name = 'data'
 
     def get_queryset(self):
+        # Les sections (films, séances, bannières, salles) sont chargées page par page par DashboardSectionView ;
+        # seules les listes des filtres sont lues ici.
         return {
-            'films': film.objects.all(),
-            'shows': show.objects.select_related('movie', 'salle').all(),
-            'banners': banner.objects.all(),
-            'salles': Salle.objects.all(),
+            'films': film.objects.only('movie_name').order_by('movie_name'),
+            'salles': Salle.objects.order_by('name'),
         }
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Panneau des ventes : lu uniquement depuis les agrégats.
+        date_from, date_to = default_sales_range()
+        context['sales'] = {
+            'date_from': date_from,
+            'date_to': date_to,
+            'by_film': sales_rows('film', date_from, date_to, limit=10),
+            'by_salle': sales_rows('salle', date_from, date_to, limit=10),
+        }
+        return context
+
+class DashboardSectionView(StaffRequiredMixin, View):
+    # Une page d'une section du tableau de bord : {"html": lignes du tableau, "next": curseur ou null}.
+    # Paramètres : cursor, limit, date_from/date_to (séances actives sur la période), salle, film.
+    sections = {
+        'films': ('staff/sections/films.html', [('movie_name', False), ('id', False)]),
+        'shows': ('staff/sections/shows.html', [('start_date', True), ('id', True)]),
+        'banners': ('staff/sections/banners.html', [('id', True)]),
+        'salles': ('staff/sections/salles.html', [('name', False)]),
+    }
+    default_limit = 25
+    max_limit = 100
+
+    def get_queryset(self, section, filters):
+        if section == 'films':
+            queryset = film.objects.all()
+            if 'film' in filters:
+                queryset = queryset.filter(pk=filters['film'])
+        elif section == 'shows':
+            queryset = show.objects.select_related('movie', 'salle')
+            if 'date_from' in filters:
+                queryset = queryset.filter(end_date__gte=filters['date_from'])
+            if 'date_to' in filters:
+                queryset = queryset.filter(start_date__lte=filters['date_to'])
+            if 'salle' in filters:
+                queryset = queryset.filter(salle_id=filters['salle'])
+            if 'film' in filters:
+                queryset = queryset.filter(movie_id=filters['film'])
+        elif section == 'banners':
+            queryset = banner.objects.select_related('movie')
+            if 'film' in filters:
+                queryset = queryset.filter(movie_id=filters['film'])
+        else:
+            queryset = Salle.objects.all()
+            if 'salle' in filters:
+                queryset = queryset.filter(pk=filters['salle'])
+        return queryset
+
+    def get(self, request, section):
+        if section not in self.sections:
+            return JsonResponse({'error': 'Unknown section'}, status=404)
+        template_name, ordering = self.sections[section]
+        try:
+            filters = parse_export_filters(request.GET)
+            limit = min(max(int(request.GET.get('limit', self.default_limit)), 1), self.max_limit)
+            rows, next_cursor = keyset_page(
+                self.get_queryset(section, filters), ordering, request.GET.get('cursor'), limit
+            )
+        except ValueError:
+            return JsonResponse({'error': 'Invalid filter or cursor'}, status=400)
+        html = render_to_string(template_name, {'rows': rows}, request=request)
+        return JsonResponse({'html': html, 'next': next_cursor})
+
+class SalesDataView(StaffRequiredMixin, View):
+    # Ventes agrégées en JSON : group=film|salle|show|day, date_from/date_to en YYYY-MM-DD.
+    def get(self, request):
+        group = request.GET.get('group', 'film')
+        if group not in SALES_GROUPS:
+            return JsonResponse({'error': f"group must be one of {', '.join(SALES_GROUPS)}"}, status=400)
+        date_from, date_to = default_sales_range()
+        try:
+            filters = parse_export_filters(request.GET)
+        except ValueError:
+            return JsonResponse({'error': 'Dates must use the YYYY-MM-DD format'}, status=400)
+        date_from = filters.get('date_from', date_from)
+        date_to = filters.get('date_to', date_to)
+        return JsonResponse({
+            'group': group,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'rows': sales_rows(group, date_from, date_to),
+        })
+
+class SlowRequestsView(StaffRequiredMixin, TemplateView):
+    # Dernières requêtes lentes de ce processus (voir ServerTimingMiddleware), les plus récentes d'abord.
+    template_name = 'staff/slow_requests.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['entries'] = slow_requests()
+        context['threshold'] = settings.SLOW_REQUEST_MS
+        return context
+
+class WaitingRoomsView(StaffRequiredMixin, View):
+    # Ouvre ou ferme la salle d'attente d'une séance depuis le serveur lui-même : contrairement à la
+    # commande waiting_room, cela fonctionne aussi avec un cache local (LocMemCache), pour ce processus.
+    template_name = 'staff/waiting_rooms.html'
+
+    def get(self, request):
+        shows = show.objects.select_related('movie', 'salle').in_bulk(open_rooms())
+        rooms = []
+        for show_id, show_obj in sorted(shows.items()):
+            status = room_status(show_id)
+            if status is not None:
+                capacity, admitted, issued, head = status
+                rooms.append({
+                    'show': show_obj, 'capacity': capacity, 'admitted': admitted,
+                    'issued': issued, 'waiting': max(issued - head + 1, 0),
+                })
+        return render(request, self.template_name, {'rooms': rooms, 'shared_cache': cache_is_shared()})
+
+    def post(self, request):
+        try:
+            show_obj = show.objects.get(pk=int(request.POST.get('show_id', '')))
+            capacity = int(request.POST.get('capacity') or 50)
+        except (show.DoesNotExist, ValueError):
+            messages.error(request, "Unknown show or invalid capacity.")
+            return redirect('staff:waiting_rooms')
+        if request.POST.get('action') == 'close':
+            close_room(show_obj.pk)
+            messages.success(request, f"Waiting room closed for {show_obj}.")
+        elif capacity < 1:
+            messages.error(request, "Capacity must be at least 1.")
+        else:
+            open_room(show_obj.pk, capacity)
+            messages.success(request, f"Waiting room open for {show_obj}: {capacity} buyer(s) at a time.")
+        return redirect('staff:waiting_rooms')
+
+class BookingExportView(StaffRequiredMixin, View):
+    # Export des ventes en flux (CSV ou NDJSON), filtrable par dates, film et salle.
+    content_types = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+    def get(self, request):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return HttpResponseBadRequest("format must be csv or ndjson")
+        try:
+            filters = parse_export_filters(request.GET)
+        except ValueError:
+            return HttpResponseBadRequest("Dates must use YYYY-MM-DD; film and salle must be ids.")
+        response = StreamingHttpResponse(iter_export(fmt, export_rows(**filters)), content_type=self.content_types[fmt])
+        response['Content-Disposition'] = f'attachment; filename="bookings.{fmt}"'
+        return response
+
 class FilmCreateView(StaffRequiredMixin, CreateView):
     model = film
     form_class = FilmForm
@@ -111,6 +273,29 @@ class ShowDeleteView(StaffRequiredMixin, DeleteView):
         context['item'] = f"{self.object.movie.movie_name} in {self.object.salle.name} at {self.object.showtime}"
         return context
 
+class ShowImportView(StaffRequiredMixin, FormView):
+    form_class = SeasonImportForm
+    template_name = 'staff/import.html'
+    success_url = reverse_lazy('staff:dashboard')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Import Season'
+        return context
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['plan']
+        fmt = 'json' if upload.name.lower().endswith('.json') else 'csv'
+        try:
+            shows = import_season(read_season(upload, fmt))
+        except ValueError as e:
+            return self.render_to_response(self.get_context_data(form=form, errors=[f"Could not read the file: {e}"]))
+        except ValidationError as e:
+            # Toutes les erreurs et conflits sont affichés en une fois.
+            return self.render_to_response(self.get_context_data(form=form, errors=e.messages))
+        messages.success(self.request, f"Imported {len(shows)} shows.")
+        return redirect(self.get_success_url())
+
 class BannerCreateView(StaffRequiredMixin, CreateView):
     model = banner
     form_class = BannerForm